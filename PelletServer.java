@@ -0,0 +1,53 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.nio.charset.StandardCharsets;
+
+import pellet.Pellet;
+import pellet.PelletCmdApp;
+
+/**
+ * Long-lived Pellet process used by owlutils.reasoner.PersistentPelletReasoner.
+ *
+ * Every line read from stdin is a tab-separated Pellet command line. The command
+ * output is written to stdout preceded by a header line "STATUS LENGTH", where
+ * STATUS is OK or ERROR and LENGTH is the size in bytes of the output.
+ */
+public class PelletServer {
+    public static void main(String[] args) throws IOException {
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        PrintStream out = System.out;
+        String line;
+
+        while ((line = in.readLine()) != null) {
+            String[] command = line.split("\t");
+            ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+            String status = "OK";
+
+            System.setOut(new PrintStream(buffer, true, "UTF-8"));
+            try {
+                // getCommand returns a shared instance which keeps the input files and
+                // options of the previous requests, so every request uses a new one
+                PelletCmdApp app = Pellet.getCommand(command[0]).getClass()
+                        .getDeclaredConstructor().newInstance();
+                app.parseArgs(command);
+                app.run();
+                app.finish();
+            } catch (Throwable e) {
+                status = "ERROR";
+                buffer.reset();
+                e.printStackTrace(new PrintStream(buffer, true, "UTF-8"));
+            } finally {
+                System.out.flush();
+                System.setOut(out);
+            }
+
+            byte[] result = buffer.toByteArray();
+            out.print(status + " " + result.length + "\n");
+            out.write(result);
+            out.flush();
+        }
+    }
+}
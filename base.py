@@ -1,11 +1,31 @@
+import asyncio
 import re
+import time
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Iterable, Union, Optional, List, Set
+from collections import deque
+from contextlib import nullcontext
+from typing import IO, Dict, Any, Callable, ContextManager, Deque, Iterable, Iterator, Union, \
+                   Optional, List, Sequence, Set, Tuple
 
 import owlready2
 import owlready2.rply
+from owlready2.sparql.main import PreparedSelectQuery
+from owlutils.cache import ReasoningCache, EntityCache, Row
+from owlutils.export import export_triples
+from owlutils.feed import ChangeFeed, Delta
+from owlutils.hooks import HookScheduler
+from owlutils.index import EntityIndex
+from owlutils.journal import ChangeJournal, ChangeSet
+from owlutils.memory import MemoryAccountant, BudgetCallback
+from owlutils.metrics import Metrics, SYNC_BUCKETS
+from owlutils.module import ModuleExtractor
+from owlutils.query import QueryLog
+from owlutils.reasoner import Reasoner, PelletReasoner, _INFERRENCES_ONTOLOGY
 from owlutils.rule import ExpressionBuilder
+from owlutils.store import Savepoint, clone_world, copy_closure, graph_revision, track_revisions
+from owlutils.tbox import TBoxCache, TBOX_ONTOLOGY, tbox_fingerprint
+from owlutils.timing import Instrumentation, SyncProfile, TimingCallback
 
 AnyOWL = Union[owlready2.AnnotationProperty,
                owlready2.PropertyClass,
@@ -33,85 +53,800 @@ class LifecycleSuperclass(ABC):
     def post_save(self) -> None:
         """Invoked after the ontology is saved to a file"""
 
+    async def async_pre_update(self) -> None:
+        """Asynchronous variant of pre_update, by default it invokes pre_update"""
+        self.pre_update()
+
+    async def async_pre_sync(self) -> None:
+        """Asynchronous variant of pre_sync, by default it invokes pre_sync"""
+        self.pre_sync()
+
+    async def async_pre_save(self) -> None:
+        """Asynchronous variant of pre_save, by default it invokes pre_save"""
+        self.pre_save()
+
+    async def async_post_update(self) -> None:
+        """Asynchronous variant of post_update, by default it invokes post_update"""
+        self.post_update()
+
+    async def async_post_sync(self) -> None:
+        """Asynchronous variant of post_sync, by default it invokes post_sync"""
+        self.post_sync()
+
+    async def async_post_save(self) -> None:
+        """Asynchronous variant of post_save, by default it invokes post_save"""
+        self.post_save()
+
+class Checkpoint:
+    """
+    State of an OntologyInterface saved by OntologyInterface.checkpoint.
+    Used as a context manager, the changes are rolled back on exit unless released
+    """
+    def __init__(self, interface: "OntologyInterface"):
+        self.interface = interface
+        self.savepoint = Savepoint(interface.ontology.world)
+        self.journal: ChangeJournal = interface.journal.copy()
+        self.untracked: bool = interface.untracked()
+        self.derived: Optional[Set[Row]] = \
+            None if interface.cache is None else set(interface.cache.derived)
+        self.entities: Dict[owlready2.Thing, Any] = dict(interface.entities)
+        self.states: List[Any] = [plugin.get_state() for plugin in interface.plugins]
+
+    def __enter__(self) -> "Checkpoint":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self in self.interface.checkpoints:
+            self.interface.rollback(self)
+
 class OntologyInterface(LifecycleSuperclass):
 
-    """Wrapper for owlready2 ontologies"""
+    """
+    Wrapper for owlready2 ontologies. If isolated is true the ontology and its imports
+    are copied into a private owlready2 World, so that the reasoner only sees them
+    """
 
     # Abstract methods
 
     def update(self, **kwargs) -> None:
-        """Add contextual information to the ontology"""
+        """
+        Add contextual information to the ontology. Individuals created or changed should be
+        recorded with mapped or touch: other changes are only detected as a change of the
+        whole ontology by the next sync, see sync. pre_update raises RuntimeError while
+        async_sync runs the reasoner
+        """
         self.pre_update()
         self.post_update()
 
     def map(self, entity_type: str, entity: Dict[str, Any]) -> owlready2.Thing:
-        """Map an entity to a individual"""
+        """
+        Map an entity to a individual, which should be recorded with mapped.
+        Implementations call ensure_idle before writing the ontology, see async_sync
+        """
 
     # Public methods
 
-    def __init__(self, ontology: owlready2.Ontology):
-        self.ontology: owlready2.Ontology = ontology
+    def __init__(self, ontology: owlready2.Ontology, reasoner: Optional[Reasoner] = None,
+                 isolated: bool = False):
+        self.isolated = isolated
+        self.ontology: owlready2.Ontology = copy_closure(ontology) if isolated else ontology
+        track_revisions(self.ontology.world)
+        self.reasoner: Reasoner = PelletReasoner() if reasoner is None else reasoner
         self.entities: Dict[owlready2.Thing, Any] = {}
         self.plugins: List[OntologyPluginInterface] = []
         self.imported: Dict[str, Any] = {}
-
-    def sync(self, global_sync: bool = False, debug: int = 0) -> None:
-        """Classify the ontology"""
-        self.pre_sync()
-
-        if global_sync:
-            owlready2.sync_reasoner_pellet(infer_data_property_values=True,
-                                           infer_property_values=True,
-                                           debug=debug)
+        self.journal: ChangeJournal = ChangeJournal()
+        self.changes: ChangeSet = ChangeSet()
+        self.replica: Optional[owlready2.Ontology] = None
+        self.cache: Optional[ReasoningCache] = None
+        self.tbox: Optional[TBoxCache] = None
+        self.modules: Optional[ModuleExtractor] = None
+        self.checkpoints: List[Checkpoint] = []
+        self.batch_size: Optional[int] = None
+        self.uncommitted: int = 0
+        self.revision: int = 0
+        self.names: EntityCache = EntityCache(self.ontology.world)
+        self.index: Optional[EntityIndex] = None
+        self.queries: QueryLog = QueryLog(self.ontology.world)
+        self.feed: ChangeFeed = ChangeFeed(self.ontology.world)
+        self.delta: Delta = Delta()
+        self.instrumentation: Optional[Instrumentation] = None
+        self.metrics: Optional[Metrics] = None
+        self.profiles: Optional[Deque[SyncProfile]] = None
+        self.profile: Optional[SyncProfile] = None
+        self.memory: Optional[MemoryAccountant] = None
+        self.hooks: Optional[HookScheduler] = None
+        self.classifying: bool = False
+        self.held: Deque[Tuple[asyncio.Future, Callable[..., Any], tuple, Dict[str, Any]]] = deque()
+
+    def sync(self, global_sync: bool = False, debug: int = 0, force: bool = False,
+             reasoner: Optional[Reasoner] = None) -> Optional[SyncProfile]:
+        """
+        Classify the ontology with the given reasoner, or with self.reasoner if None.
+        The reasoner is not invoked when nothing has been recorded in the journal
+        since the last sync, unless force is true. If the ontology or its imports have been
+        written without recording the changes, e.g. by an update modifying the ontology
+        directly, the whole ontology is classified.
+        During the sync the flushed changes are available to plugins in self.changes,
+        and the triples changed by the reasoner in self.delta.
+        Return the profile of the sync if profiling is enabled
+        """
+        if self.journal.is_empty() and self.untracked():
+            self.journal.record_all()
+        if self.journal.is_empty() and not force:
+            return None
+
+        start = time.perf_counter()
+        self.changes = self.journal.flush()
+        self.__begin_profile()
+
+        try:
+            with self.__phase("pre_sync"):
+                self.pre_sync()
+            reasoner = self.reasoner if reasoner is None else reasoner
+            reasoner.cancelled.clear()
+            self.__classify(reasoner, global_sync, debug)
+            with self.__phase("post_sync"):
+                self.post_sync()
+                self.__publish()
+            with self.__phase("persist"):
+                self.__replicate()
+                self.__persist()
+            self.revision = self.__revision()
+            self.__observe(start)
+        except Exception:
+            self.journal.merge(self.changes)
+            raise
+
+        return self.__end_profile(start)
+
+    async def async_sync(self, global_sync: bool = False, debug: int = 0, force: bool = False,
+                         reasoner: Optional[Reasoner] = None,
+                         timeout: Optional[float] = None) -> Optional[SyncProfile]:
+        """
+        Asynchronous variant of sync. Plugin hooks are awaited on the event loop in
+        registration order, pre_sync before and post_sync after the reasoner, which runs
+        in a worker thread. If the timeout expires or the task is cancelled, the reasoner
+        is cancelled (killing its java process), post_sync is skipped and the changes
+        are kept in the journal for the next sync.
+        The ontology must not be written while the reasoner runs: map, update and mapped
+        raise RuntimeError, see ensure_idle, while async_map and async_update wait for the reasoner and
+        are applied in the order they were called as soon as it completes, before post_sync.
+        Queries should read the replica, see read
+        """
+        if self.journal.is_empty() and self.untracked():
+            self.journal.record_all()
+        if self.journal.is_empty() and not force:
+            return None
+
+        start = time.perf_counter()
+        self.changes = self.journal.flush()
+        self.__begin_profile()
+        reasoner = self.reasoner if reasoner is None else reasoner
+
+        try:
+            with self.__phase("pre_sync"):
+                await self.async_pre_sync()
+
+            reasoner.cancelled.clear()
+            self.classifying = True
+            try:
+                future = asyncio.get_running_loop().run_in_executor(
+                    None, self.__classify, reasoner, global_sync, debug)
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), timeout)
+                except (asyncio.CancelledError, asyncio.TimeoutError):
+                    reasoner.cancel()
+                    await asyncio.gather(future, return_exceptions=True)
+                    raise
+            finally:
+                self.classifying = False
+                self.__release_held()
+
+            with self.__phase("post_sync"):
+                await self.async_post_sync()
+                self.__publish()
+            with self.__phase("persist"):
+                self.__replicate()
+                self.__persist()
+            self.revision = self.__revision()
+            self.__observe(start)
+        except BaseException:
+            self.journal.merge(self.changes)
+            raise
+
+        return self.__end_profile(start)
+
+    async def async_map(self, entity_type: str, entity: Dict[str, Any]) -> owlready2.Thing:
+        """Map an entity, once the reasoner run by async_sync has completed, see async_sync"""
+        return await self.__when_idle(self.map, entity_type, entity)
+
+    async def async_update(self, **kwargs) -> None:
+        """Update the ontology, once the reasoner run by async_sync has completed, see async_sync"""
+        await self.__when_idle(self.update, **kwargs)
+
+    def ensure_idle(self) -> None:
+        """Raise RuntimeError if the reasoner run by async_sync is in progress"""
+        if self.classifying:
+            raise RuntimeError("The ontology cannot be written while async_sync runs the reasoner, "
+                               "use async_map or async_update")
+
+    async def __when_idle(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call function now, or hold the call until the reasoner run off-loop has completed"""
+        if not self.classifying:
+            return function(*args, **kwargs)
+        future = asyncio.get_running_loop().create_future()
+        self.held.append((future, function, args, kwargs))
+        return await future
+
+    def __release_held(self) -> None:
+        """Apply the calls held while the reasoner was running, in the order they were made"""
+        while self.held:
+            future, function, args, kwargs = self.held.popleft()
+            if future.cancelled():
+                continue
+            try:
+                future.set_result(function(*args, **kwargs))
+            except Exception as err:  # pylint: disable=broad-except
+                future.set_exception(err)
+
+    def enable_cache(self, directory: str, max_entries: int = 64) -> None:
+        """Cache on disk the results of the reasoner, see ReasoningCache"""
+        self.cache = ReasoningCache(directory, max_entries)
+
+    def disable_cache(self) -> None:
+        """Always invoke the reasoner"""
+        self.cache = None
+
+    def enable_tbox_cache(self, directory: Optional[str] = None) -> None:
+        """Classify the TBox once per schema version and only realize individuals, see TBoxCache"""
+        self.tbox = TBoxCache(directory)
+
+    def disable_tbox_cache(self) -> None:
+        """Stop asserting the cached classification of the TBox"""
+        self.tbox = None
+
+    def enable_module_extraction(self, depth: int = 2, max_individuals: int = 10000) -> None:
+        """Classify only the neighborhood of the changed individuals, see ModuleExtractor"""
+        self.modules = ModuleExtractor(depth, max_individuals)
+
+    def disable_module_extraction(self) -> None:
+        """Classify the whole ontology on every sync"""
+        self.modules = None
+
+    def subscribe(self, subscriber: Callable[[Delta], Any]) -> None:
+        """Invoke subscriber with the delta of every sync, after post_sync, see ChangeFeed"""
+        self.feed.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Callable[[Delta], Any]) -> None:
+        """Stop invoking a subscriber"""
+        if subscriber in self.feed.subscribers:
+            self.feed.subscribers.remove(subscriber)
+
+    def __publish(self) -> None:
+        """Pass the delta of the sync to the subscribers"""
+        self.feed.publish(self.delta)
+
+    def __classify(self, reasoner: Reasoner, global_sync: bool, debug: int) -> None:
+        """
+        Invoke the reasoner, recording the triples it changed in the change feed and
+        updating the index entries of the individuals it changed
+        """
+        feed, metrics, index = self.feed, self.metrics, self.index
+        with self.__phase("feed"):
+            feed.begin()
+            triples = metrics.triple_count() if metrics is not None else 0
+        with self.__phase("index"):
+            if index is not None:
+                index.begin()
+        try:
+            self.__infer(reasoner, global_sync, debug)
+        finally:
+            with self.__phase("index"):
+                if index is not None:
+                    index.end()
+            with self.__phase("feed"):
+                self.delta = feed.end()
+        with self.__phase("feed"):
+            if metrics is not None:
+                metrics.inferred += max(0, metrics.triple_count() - triples)
+
+    def __infer(self, reasoner: Reasoner, global_sync: bool, debug: int) -> None:
+        """Invoke the reasoner, or replay its cached results"""
+        if self.tbox is not None:
+            with self.__phase("tbox"):
+                self.tbox.prepare(self.ontology.world, debug)
+
+        cache = self.cache
+        if cache is None or global_sync:
+            self.__reason(reasoner, global_sync, debug)
+            return
+
+        with self.__phase("cache"):
+            key = cache.fingerprint(self.ontology.world,
+                                    "\n".join(plugin.fingerprint() for plugin in self.plugins),
+                                    (_INFERRENCES_ONTOLOGY, TBOX_ONTOLOGY))
+            triples = cache.load(key)
+
+            if triples is not None:
+                cache.hits += 1
+                cache.apply(self.ontology, triples, debug)
+                return
+
+            cache.misses += 1
+            before = cache.snapshot(self.ontology)
+
+        complete = self.__reason(reasoner, global_sync, debug)
+        with self.__phase("cache"):
+            triples = cache.inferred(self.ontology, before)
+            if complete and triples is not None:
+                cache.store(key, triples)
+
+    def __reason(self, reasoner: Reasoner, global_sync: bool, debug: int) -> bool:
+        """
+        Invoke the reasoner on the ontology, or on the module affected by the changes.
+        Return true if the whole ontology has been classified
+        """
+        modules = self.modules
+        module = None
+        version = None
+        if modules is not None and not global_sync:
+            with self.__phase("module"):
+                version = tbox_fingerprint(self.ontology.world)
+                module = modules.extract(self.ontology.world, self.changes, version)
+
+        profile = self.profile
+        verbose = reasoner.verbose
+        reasoner.verbose = verbose or profile is not None
+        reasoner.phases = {}
+        try:
+            with self.__phase("reasoner"), self.__timed(reasoner, "reason"):
+                reasoner.reason(None if global_sync and not self.isolated else self.ontology,
+                                debug, module)
+        finally:
+            reasoner.verbose = verbose
+
+        if profile is not None:
+            profile.reasoner.update(reasoner.phases)
+            profile.output = reasoner.log
+
+        with self.__phase("module"):
+            if modules is not None:
+                modules.commit(self.ontology.world, None if module is None else version)
+        return module is None
+
+    def enable_batched_commits(self, batch_size: int = 1000) -> None:
+        """
+        Commit the on-disk quadstore of the ontology, see open_world, after every update,
+        every sync and every batch_size individuals recorded with mapped
+        """
+        self.batch_size = batch_size
+
+    def disable_batched_commits(self) -> None:
+        """Leave the commits of the quadstore to the application"""
+        self.batch_size = None
+
+    def commit(self) -> None:
+        """Commit the quadstore, unless a checkpoint is open"""
+        if not self.checkpoints:
+            self.ontology.world.graph.commit()
+            self.uncommitted = 0
+
+    def mapped(self, *individuals: owlready2.Thing) -> None:
+        """
+        Record the individuals created by map, committing the quadstore every batch_size.
+        The individuals are indexed again if the index is enabled
+        """
+        self.ensure_idle()
+        self.journal.record(*individuals)
+        self.reindex(*individuals)
+        if self.metrics is not None:
+            self.metrics.mapped += len(individuals)
+        if self.memory is not None:
+            self.memory.individuals += len(individuals)
+        if self.batch_size is not None:
+            self.uncommitted += len(individuals)
+            if self.uncommitted >= self.batch_size:
+                self.commit()
+
+    def touch(self, *entities: AnyOWL) -> None:
+        """
+        Record entities changed outside of map and update, so that the next sync classifies them.
+        Without arguments the whole ontology is marked as changed
+        """
+        if len(entities) == 0:
+            self.journal.record_all()
+        self.journal.record(*entities)
+        self.reindex(*(x for x in entities if isinstance(x, owlready2.Thing)))
+
+    def enable_index(self, *properties: Union[str, owlready2.DataPropertyClass]) -> None:
+        """
+        Index the individuals by class and by the values of the given data properties,
+        so that find does not scan the ontology, see EntityIndex
+        """
+        properties = [self.get(x) if isinstance(x, str) else x for x in properties]
+        self.index = EntityIndex(self.ontology.world, properties)
+
+    def disable_index(self) -> None:
+        """Let find scan the instances of the class"""
+        self.index = None
+
+    def reindex(self, *individuals: owlready2.Thing) -> None:
+        """Read again the types and the indexed values of individuals changed outside of map"""
+        if self.index is not None:
+            self.index.update(*(x.storid for x in individuals))
+
+    def find(self, owl_class: Union[str, owlready2.ThingClass],
+             **property_equals: Any) -> List[owlready2.Thing]:
+        """
+        Return the instances of a class, or of the class with the given name, having each
+        of the given values for the property with the same name, e.g. find("Interface", hasName="eth0")
+        """
+        owl_class = self.get(owl_class) if isinstance(owl_class, str) else owl_class
+        if owl_class is None:
+            return []
+
+        world = self.ontology.world
+        index = self.index
+        props = {name: self.get(name) for name in property_equals}
+        if any(prop is None for prop in props.values()):
+            return []
+
+        if index is None:
+            candidates = list(owl_class.instances())
         else:
-            owlready2.sync_reasoner_pellet(self.ontology,
-                                           infer_data_property_values=True,
-                                           infer_property_values=True,
-                                           debug=debug)
+            storids = index.instances(owl_class)
+            for name, prop in props.items():
+                having = index.having(prop, property_equals[name])
+                if having is not None:
+                    storids = storids & having
+            candidates = [world._get_by_storid(x) for x in storids]
 
-        self.post_sync()
+        return [individual for individual in candidates
+                if individual is not None and
+                all(property_equals[name] in prop[individual] for name, prop in props.items())]
 
     def get(self, name: str = None) -> Optional[AnyOWL]:
-        """Return owlready ontology or an entity"""
+        """Return owlready ontology or an entity, entities are cached in self.names"""
         if name is None:
             return self.ontology
-        return getattr(self.ontology, name)
+
+        entity = self.names.get(name)
+        if entity is None:
+            entity = getattr(self.ontology, name)
+            if entity is not None:
+                self.names.put(name, entity)
+        return entity
+
+    def query(self, text: str, params: Sequence[Any] = (),
+              stream: bool = False) -> Union[List[list], Iterator[list], int]:
+        """
+        Execute a SPARQL query compiled once by owlready2 and timed in self.queries,
+        binding the parameters (?? or ??1 placeholders). If stream is true the rows are
+        returned as a generator. Modify queries return the number of matches and mark the whole
+        ontology as changed, the individuals they write are indexed again
+        """
+        if isinstance(self.queries.prepare(text), PreparedSelectQuery):
+            return self.queries.execute(text, params, stream)
+
+        index = self.index
+        if index is not None:
+            index.begin()
+        try:
+            result = self.queries.execute(text, params, stream)
+        finally:
+            if index is not None:
+                index.end()
+        self.touch()
+        return result
+
+    def enable_replica(self) -> None:
+        """
+        Keep a read-only copy of the ontology as it was after the last sync,
+        replaced by a new copy at the end of every sync. The world of the previous
+        copy is closed, so the entities read from it must not be used anymore
+        """
+        replica = self.replica
+        self.replica = clone_world(self.ontology.world).get_ontology(self.ontology.base_iri)
+        if replica is not None:
+            replica.world.close()
+
+    def disable_replica(self) -> None:
+        """Stop updating the read-only copy of the ontology and close its world"""
+        replica = self.replica
+        self.replica = None
+        if replica is not None:
+            replica.world.close()
+
+    def read(self, name: str = None) -> Optional[AnyOWL]:
+        """
+        Return the ontology or an entity from the copy made after the last sync,
+        or from the live ontology if the replica is disabled.
+        The replica must not be modified, and its entities are valid until the next sync
+        """
+        replica = self.replica
+        if replica is None:
+            return self.get(name)
+        if name is None:
+            return replica
+        return getattr(replica, name)
+
+    def export(self, file: Union[str, IO[bytes]], quads: bool = False, inferred: bool = True,
+               comments: bool = True, compress: Optional[bool] = None,
+               chunk_size: int = 10000) -> int:
+        """
+        Stream the ontology and its imports to a path or a binary file object, see
+        export_triples. If inferred is true the ontologies where the facts inferred
+        by global syncs and the cached TBox classification are asserted are included too,
+        otherwise the triples added by the syncs of this session to the ontology itself,
+        recorded by the change feed, are left out as well.
+        Return the number of triples written
+        """
+        world = self.ontology.world
+        ontologies = list(self.ontology.indirectly_imported_ontologies())
+        if inferred:
+            ontologies.extend(world.ontologies[iri] for iri in (_INFERRENCES_ONTOLOGY, TBOX_ONTOLOGY)
+                              if iri in world.ontologies)
+
+        self.pre_save()
+        count = export_triples(ontologies, file, quads, comments, compress, chunk_size,
+                               None if inferred else ChangeFeed.INFERRED)
+        self.post_save()
+        return count
 
     def import_ontology(self, ontology: Any) -> None:
-        """Import an ontology"""
-        self.imported[ontology.get().name] = ontology
-        self.get().imported.append(ontology.get())
+        """Import an ontology, copying it with its imports into the private world if isolated"""
+        imported = ontology.get()
+        if imported.world is not self.ontology.world:
+            imported = copy_closure(imported, self.ontology.world)
+
+        self.imported[imported.name] = ontology
+        self.get().imported_ontologies.append(imported)
+        self.journal.record_all()
+
+    def checkpoint(self) -> Checkpoint:
+        """
+        Save the state of the ontology, of the journal, of the plugins and of the triples the
+        reasoning cache knows to be inferred, so that the changes
+        made afterwards, e.g. speculative map and sync, can be discarded with rollback.
+        The quadstore must not be committed until the checkpoint is rolled back or released,
+        the read-only replica is not updated in the meantime
+        """
+        checkpoint = Checkpoint(self)
+        self.checkpoints.append(checkpoint)
+        return checkpoint
+
+    def rollback(self, checkpoint: Optional[Checkpoint] = None) -> None:
+        """Restore the state saved by a checkpoint, the last one if None, and drop the later ones"""
+        checkpoint = self.checkpoints[-1] if checkpoint is None else checkpoint
+        del self.checkpoints[self.checkpoints.index(checkpoint):]
+
+        touched = checkpoint.savepoint.rollback()
+        self.names.invalidate()
+        if self.index is not None:
+            self.index.update(*(storid for storid in touched if storid > 0))
+        self.journal = checkpoint.journal
+        if checkpoint.untracked:
+            self.journal.record_all()
+        self.revision = self.__revision()
+        if self.cache is not None:
+            self.cache.derived = set() if checkpoint.derived is None else checkpoint.derived
+        self.entities = checkpoint.entities
+        for plugin, state in zip(self.plugins, checkpoint.states):
+            plugin.set_state(state)
+
+    def release(self, checkpoint: Optional[Checkpoint] = None) -> None:
+        """Keep the changes made since a checkpoint, the last one if None, and drop the later ones"""
+        checkpoint = self.checkpoints[-1] if checkpoint is None else checkpoint
+        del self.checkpoints[self.checkpoints.index(checkpoint):]
+
+        checkpoint.savepoint.release()
+        self.__replicate()
+
+    def __replicate(self) -> None:
+        """Replace the read-only copy of the ontology with the synced state"""
+        if self.replica is not None and not self.checkpoints:
+            self.enable_replica()
+
+    def enable_instrumentation(self, callback: Optional[TimingCallback] = None) -> None:
+        """Record the time spent in plugin hooks and in the reasoner, see Instrumentation"""
+        self.instrumentation = Instrumentation(callback)
+
+    def disable_instrumentation(self) -> None:
+        """Stop recording the time spent in plugin hooks and in the reasoner"""
+        self.instrumentation = None
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Return the timings of every hook of every plugin and of the reasoner, the plugins
+        are named after their class and their position in plugins, e.g. RuleManager#0
+        """
+        if self.instrumentation is None:
+            return {}
+        return self.instrumentation.report()
+
+    def enable_metrics(self, buckets: Sequence[float] = SYNC_BUCKETS) -> Metrics:
+        """
+        Count map calls, syncs, inferred triples and applied actions, see Metrics.
+        buckets are the upper bounds of the sync duration histogram, in seconds
+        """
+        self.metrics = Metrics(self, buckets)
+        return self.metrics
+
+    def disable_metrics(self) -> None:
+        """Stop counting"""
+        self.metrics = None
+
+    def enable_memory_accounting(self, budget: Optional[int] = None,
+                                 callback: Optional[BudgetCallback] = None, refuse: bool = False,
+                                 sample: int = 10, history: int = 100) -> MemoryAccountant:
+        """Report the memory used and enforce a budget on map, see MemoryAccountant"""
+        self.disable_memory_accounting()
+        self.memory = MemoryAccountant(self, budget, callback, refuse, sample, history)
+        return self.memory
+
+    def disable_memory_accounting(self) -> None:
+        """Stop accounting memory, stopping tracemalloc if it was started for it"""
+        if self.memory is not None:
+            self.memory.close()
+        self.memory = None
+
+    def enable_parallel_hooks(self, workers: int = 4) -> None:
+        """
+        Run the lifecycle hooks of the plugins as a graph of their dependencies, the I/O-bound
+        thread-safe ones in workers threads, see HookScheduler and OntologyPluginInterface.
+        Raise ValueError if the dependencies of the registered plugins are cyclic
+        """
+        HookScheduler.dependencies(self.plugins)
+        self.disable_parallel_hooks()
+        self.hooks = HookScheduler(workers)
+
+    def disable_parallel_hooks(self) -> None:
+        """Run the lifecycle hooks of the plugins one at a time, in the order they were registered"""
+        if self.hooks is not None:
+            self.hooks.close()
+        self.hooks = None
+
+    def enable_profiling(self, history: int = 100) -> None:
+        """
+        Profile every sync, see SyncProfile: sync returns the profile, which is also
+        kept in self.profile, and the last history profiles are kept in self.profiles
+        """
+        self.profiles = deque(maxlen=history)
+
+    def disable_profiling(self) -> None:
+        """Stop profiling syncs"""
+        self.profiles = None
+        self.profile = None
+
+    def __begin_profile(self) -> None:
+        """Start the profile of a sync if profiling is enabled"""
+        self.profile = SyncProfile() if self.profiles is not None else None
+
+    def __end_profile(self, start: float) -> Optional[SyncProfile]:
+        """Complete the profile of a sync and add it to the history"""
+        profile = self.profile
+        if profile is not None and self.profiles is not None:
+            profile.total = time.perf_counter() - start
+            self.profiles.append(profile)
+        return profile
+
+    def __phase(self, name: str) -> ContextManager[None]:
+        """Time a phase of a sync if profiling is enabled"""
+        if self.profile is None:
+            return nullcontext()
+        return self.profile.phase(name)
+
+    def untracked(self) -> bool:
+        """Return true if the ontology or its imports have been written since the last sync"""
+        return self.__revision() != self.revision
+
+    def __revision(self) -> int:
+        """Return the number of triples written in the ontology and its imports"""
+        return graph_revision(self.ontology.world,
+                              (x.graph.c for x in self.ontology.indirectly_imported_ontologies()))
+
+    def __observe(self, start: float) -> None:
+        """Add the duration of a sync to the histogram if the metrics are enabled"""
+        if self.metrics is not None:
+            self.metrics.syncs.observe(time.perf_counter() - start)
+
+    def __timed(self, component: Any, hook: str) -> ContextManager[None]:
+        """
+        Time a hook of a plugin or of the reasoner if the instrumentation is enabled.
+        Plugins are named after their class and their position in plugins, e.g. RuleManager#0
+        """
+        if self.instrumentation is None:
+            return nullcontext()
+        name = type(component).__name__
+        position = next((i for i, plugin in enumerate(self.plugins) if plugin is component), None)
+        if position is not None:
+            name = f"{name}#{position}"
+        return self.instrumentation.measure(name, hook)
+
+    def __persist(self) -> None:
+        """Commit the quadstore if batched commits are enabled"""
+        if self.batch_size is not None:
+            self.commit()
+
+    def __fan_out(self, hook: str) -> None:
+        """Invoke a hook of every plugin, one at a time or with the hook scheduler"""
+        def call(plugin: OntologyPluginInterface) -> None:
+            with self.__timed(plugin, hook):
+                getattr(plugin, hook)()
+
+        if self.hooks is None:
+            for plugin in self.plugins:
+                call(plugin)
+        else:
+            self.hooks.run(self.plugins, call)
+
+    async def __async_fan_out(self, hook: str) -> None:
+        """Await the asynchronous variant of a hook of every plugin"""
+        async def call(plugin: OntologyPluginInterface) -> None:
+            with self.__timed(plugin, hook):
+                await getattr(plugin, "async_" + hook)()
+
+        if self.hooks is None:
+            for plugin in self.plugins:
+                await call(plugin)
+        else:
+            await self.hooks.run_async(self.plugins, call)
 
     # Lifecycle methods
 
     def pre_update(self) -> None:
-        for plugin in self.plugins:
-            plugin.pre_update()
+        self.ensure_idle()
+        self.__fan_out("pre_update")
 
     def pre_sync(self) -> None:
-        for plugin in self.plugins:
-            plugin.pre_sync()
+        self.__fan_out("pre_sync")
 
     def pre_save(self) -> None:
-        for plugin in self.plugins:
-            plugin.pre_save()
+        self.__fan_out("pre_save")
 
     def post_update(self) -> None:
-        for plugin in self.plugins:
-            plugin.post_update()
+        self.__fan_out("post_update")
+        self.__persist()
 
     def post_sync(self) -> None:
-        for plugin in self.plugins:
-            plugin.post_sync()
+        self.__fan_out("post_sync")
 
     def post_save(self) -> None:
-        for plugin in self.plugins:
-            plugin.pre_save()
+        self.__fan_out("post_save")
+
+    async def async_pre_update(self) -> None:
+        self.ensure_idle()
+        await self.__async_fan_out("pre_update")
+
+    async def async_pre_sync(self) -> None:
+        await self.__async_fan_out("pre_sync")
+
+    async def async_pre_save(self) -> None:
+        await self.__async_fan_out("pre_save")
+
+    async def async_post_update(self) -> None:
+        await self.__async_fan_out("post_update")
+        self.__persist()
+
+    async def async_post_sync(self) -> None:
+        await self.__async_fan_out("post_sync")
+
+    async def async_post_save(self) -> None:
+        await self.__async_fan_out("post_save")
 
 # Ontology plugin interface
 
 class OntologyPluginInterface(LifecycleSuperclass):
-    """Abstract class for an ontology plugin"""
+    """
+    Abstract class for an ontology plugin. With parallel hooks enabled, the hooks of a
+    plugin run after the ones of the instances of the plugin classes in dependencies and,
+    if the plugin is thread_safe and io_bound, in a worker thread, see HookScheduler
+    """
+    dependencies: Sequence[type] = ()
+    thread_safe: bool = False
+    io_bound: bool = False
+
     def __init__(self, ontology: OntologyInterface):
         self.ontology = ontology
         self.ontology.plugins.append(self)
@@ -120,6 +855,17 @@ class OntologyPluginInterface(LifecycleSuperclass):
     def reserved_names(self) -> Iterable[str]:
         """Names that are reserved to the plugin"""
 
+    def fingerprint(self) -> str:
+        """State of the plugin affecting the reasoning results, not stored in the ontology"""
+        return ""
+
+    def get_state(self) -> Any:
+        """State of the plugin not stored in the ontology, saved by a checkpoint"""
+        return None
+
+    def set_state(self, state: Any) -> None:
+        """Restore the state returned by get_state when a checkpoint is rolled back"""
+
 # Specialized ontology plugin interfaces
 class ActuatorInterface(OntologyPluginInterface):
     """
@@ -149,6 +895,7 @@ class ActuatorInterface(OntologyPluginInterface):
             for function in functions:
                 Action(function)
 
+        ontology.touch(Action, actsOn, *Action.instances())
         super().__init__(ontology)
 
     def reserved_names(self) -> Iterable[str]:
@@ -158,45 +905,60 @@ class ActuatorInterface(OntologyPluginInterface):
         """Execute the inferred actions"""
         response = {"applied-actions": []}
         if individual is None:
-            for individual in self.ontology.get().Action.instances():
+            for individual in self.ontology.find('Action'):
 
                 for target in individual.actsOn:
                     result = getattr(self, individual.name)(target)
+                    self.__count(individual.name)
                     response['applied-actions'].append({
                         'action': individual.name,
                         'target': target.name,
                         'result': result
                     })
 
-                name = individual.name
-                owlready2.destroy_entity(individual)
-                self.ontology.get('Action')(name)
+                self.__reset_action(individual)
 
         elif isinstance(individual, self.ontology.get('Action')) and target is None:
 
             for target in individual.actsOn:
                 result = getattr(self, individual.name)(target)
+                self.__count(individual.name)
                 response['applied-actions'].append({
                     'action': individual.name,
                     'target': target.name,
                     'result': result
                 })
 
-            name = individual.name
-            owlready2.destroy_entity(individual)
-            self.ontology.get('Action')(name)
+            self.__reset_action(individual)
 
         elif isinstance(individual, self.ontology.get('Action')) and isinstance(target, owlready2.Thing):
             result = getattr(self, individual.name)(target)
+            self.__count(individual.name)
             response['applied-actions'].append({
                 'action': individual.name,
                 'target': target.name,
                 'result': result
             })
             getattr(self.ontology.get(), individual.name).actsOn.remove(target)
+            self.ontology.touch(individual, target)
 
         return response
 
+    def __count(self, action: str) -> None:
+        """Count an applied action if the metrics are enabled"""
+        if self.ontology.metrics is not None:
+            self.ontology.metrics.record_action(action)
+
+    def __reset_action(self, individual: owlready2.Thing) -> None:
+        """Replace an applied action with a new individual having the same name"""
+        name = individual.name
+        self.ontology.journal.record(*individual.actsOn)
+        if self.ontology.index is not None:
+            self.ontology.index.discard(individual.storid)
+        owlready2.destroy_entity(individual)
+        self.ontology.names.invalidate(name)
+        self.ontology.touch(self.ontology.get('Action')(name))
+
 
 # Concrete plugins
 
@@ -214,6 +976,8 @@ class RuleManager(OntologyPluginInterface):
                 equivalent_to = [owlready2.Thing]
                 comment = "Added by owlutils"
 
+        ontology.touch(Thing)
+
         for rule in self.rules():
             self.add_rule(rule)
 
@@ -221,6 +985,15 @@ class RuleManager(OntologyPluginInterface):
         """Returns a set of static rules"""
         return set()
 
+    def fingerprint(self) -> str:
+        return "\n".join(sorted(self.saved_rules))
+
+    def get_state(self) -> Any:
+        return set(self.saved_rules)
+
+    def set_state(self, state: Any) -> None:
+        self.saved_rules = set(state)
+
     def reserved_names(self) -> Iterable[str]:
         return ["Thing"]
 
@@ -261,20 +1034,28 @@ class RuleManager(OntologyPluginInterface):
     def post_sync(self) -> None:
         """Remove rules after classification"""
         for rule in self.ontology.get().rules():
+            name = rule.name
             owlready2.destroy_entity(rule)
+            self.ontology.names.invalidate(name)
 
     def add_rule(self, rule_expr: str):
         """Add a rule to the ontology given its string expression"""
+        if rule_expr not in self.saved_rules:
+            self.ontology.journal.record_rule(rule_expr)
         self.saved_rules.add(rule_expr)
 
     def remove_rule(self, rule_expr: str):
         """Remove rule from set given"""
         self.saved_rules.remove(rule_expr)
+        self.ontology.journal.record_rule(rule_expr)
 
     def replace_rules(self, rules: Iterable[str]):
         """Replace all the rules with the ones passed in the argument"""
-        self.saved_rules = set(rules)
+        rules = set(rules)
+        for rule_expr in rules.symmetric_difference(self.saved_rules):
+            self.ontology.journal.record_rule(rule_expr)
+        self.saved_rules = rules
 
     def clear_rules(self):
         """Remove all rules"""
-        self.saved_rules = set()
+        self.replace_rules(set())
@@ -0,0 +1,180 @@
+"""Delta debugging of slow syncs over the rules and the class expressions of an ontology"""
+import os
+import sqlite3
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import owlready2
+from owlutils.base import OntologyInterface, RuleManager
+from owlutils.reasoner import Reasoner, PelletReasoner
+from owlutils.store import clone_world
+
+Component = Tuple[str, str]
+
+_TEMPLATE: Optional[owlready2.World] = None
+
+
+class SyncSnapshot:
+    """
+    Quadstore of an OntologyInterface saved in filename, with the rules of its rule managers
+    and the classes built for the class expressions of the rules, as (expression, iri) pairs
+    """
+
+    def __init__(self, filename: str, base_iri: str, rules: Sequence[str],
+                 expressions: Dict[str, str]):
+        self.filename = filename
+        self.base_iri = base_iri
+        self.rules: List[str] = sorted(rules)
+        self.expressions: Dict[str, str] = dict(expressions)
+
+    @staticmethod
+    def capture(interface: OntologyInterface, filename: str) -> "SyncSnapshot":
+        """Save the state of the interface, the quadstore is committed"""
+        rules, expressions = set(), {}
+        for plugin in interface.plugins:
+            if isinstance(plugin, RuleManager):
+                rules.update(plugin.saved_rules)
+                expressions.update(plugin.expression_builder.classes)
+
+        world = interface.ontology.world
+        world.graph.commit()
+        target = sqlite3.connect(filename)
+        try:
+            world.graph.db.backup(target)
+        finally:
+            target.close()
+        return SyncSnapshot(filename, interface.ontology.base_iri, rules, expressions)
+
+    def components(self) -> List[Component]:
+        """Return the rules and the expression classes that can be removed from a trial"""
+        return [("rule", rule) for rule in self.rules] + \
+               [("expression", iri) for iri in sorted(set(self.expressions.values()))]
+
+
+class BisectionReport:
+    """
+    Result of a SyncBisector run: the sync time with every component and without any,
+    the minimal set of components keeping the sync slow, and the marginal cost of each of
+    them, i.e. the time saved removing it alone, from the most expensive
+    """
+
+    def __init__(self, full: float, empty: float, threshold: float, culprits: List[Component],
+                 costs: List[Tuple[Component, float]], trials: int):
+        self.full = full
+        self.empty = empty
+        self.threshold = threshold
+        self.culprits = culprits
+        self.costs = costs
+        self.trials = trials
+
+    def __repr__(self) -> str:
+        return (f"BisectionReport(full={self.full:.3f}, empty={self.empty:.3f}, "
+                f"culprits={len(self.culprits)}, trials={self.trials})")
+
+
+class SyncBisector:
+    """
+    Find the rules and class expressions making a sync slow by delta debugging: a subset of
+    the components of a snapshot is slow if the sync keeping only them takes at least
+    threshold of the way from the time without any component to the time with all of them.
+    The minimal slow subset found by ddmin is then ranked by marginal cost.
+    A trial loads the snapshot into a new world, keeps the selected rules, strips the
+    restrictions of the expression classes not selected and times a sync with a reasoner
+    made by reasoner_factory, which must be picklable. The trials of a round run in
+    parallel worker processes, every trial is repeated repeat times and the fastest is kept
+    """
+
+    def __init__(self, snapshot: SyncSnapshot,
+                 reasoner_factory: Callable[[], Reasoner] = PelletReasoner,
+                 workers: Optional[int] = None, threshold: float = 0.5, repeat: int = 1):
+        self.snapshot = snapshot
+        self.reasoner_factory = reasoner_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.repeat = max(1, repeat)
+        self.trials: int = 0
+
+    def run(self) -> BisectionReport:
+        """Bisect the components of the snapshot"""
+        components = self.snapshot.components()
+        self.trials = 0
+
+        with ProcessPoolExecutor(self.workers, initializer=_load_template,
+                                 initargs=(self.snapshot.filename,)) as executor:
+
+            def timings(subsets: List[List[Component]]) -> List[float]:
+                self.trials += len(subsets) * self.repeat
+                futures = [[executor.submit(_trial, self.snapshot, subset, self.reasoner_factory)
+                            for _ in range(self.repeat)] for subset in subsets]
+                return [min(future.result() for future in repeated) for repeated in futures]
+
+            full, empty = timings([components, []])
+            threshold = empty + self.threshold * (full - empty)
+            culprits = self.ddmin(components, lambda subsets: [t >= threshold for t in timings(subsets)]) \
+                if full > empty else []
+
+            without = timings([[x for x in components if x != culprit] for culprit in culprits])
+            costs = sorted(((culprit, full - time) for culprit, time in zip(culprits, without)),
+                           key=lambda item: item[1], reverse=True)
+
+        return BisectionReport(full, empty, threshold, culprits, costs, self.trials)
+
+    @staticmethod
+    def ddmin(components: List[Component],
+              slow: Callable[[List[List[Component]]], List[bool]]) -> List[Component]:
+        """
+        Return a 1-minimal subset of components that is slow, slow tests a list of subsets
+        at once so that the subsets and the complements of a round are tested in parallel
+        """
+        current = list(components)
+        granularity = 2
+        while len(current) >= 2:
+            size = -(-len(current) // granularity)
+            chunks = [current[i:i + size] for i in range(0, len(current), size)]
+            complements = [[x for x in current if x not in chunk] for chunk in chunks]
+            results = slow(chunks + complements)
+
+            if any(results[:len(chunks)]):
+                current = chunks[results.index(True)]
+                granularity = 2
+            elif any(results[len(chunks):]):
+                current = complements[results[len(chunks):].index(True)]
+                granularity = max(granularity - 1, 2)
+            elif granularity >= len(current):
+                break
+            else:
+                granularity = min(len(current), granularity * 2)
+        return current
+
+
+def _load_template(filename: str) -> None:
+    """Open the snapshot in a worker process"""
+    global _TEMPLATE  # pylint: disable=global-statement
+    _TEMPLATE = owlready2.World(filename=filename, exclusive=False)
+
+
+def _trial(snapshot: SyncSnapshot, subset: List[Component],
+           reasoner_factory: Callable[[], Reasoner]) -> float:
+    """Return the time of a sync keeping only the components in subset, infinite if it fails"""
+    world = clone_world(_TEMPLATE)
+    ontology = world.get_ontology(snapshot.base_iri)
+    selected = set(subset)
+
+    for iri in set(snapshot.expressions.values()):
+        owl_class = world[iri]
+        if ("expression", iri) not in selected and isinstance(owl_class, owlready2.ThingClass):
+            owl_class.is_a = [owlready2.Thing]
+
+    interface = OntologyInterface(ontology, reasoner_factory())
+    RuleManager(interface).replace_rules(rule for kind, rule in subset if kind == "rule")
+
+    start = time.perf_counter()
+    try:
+        interface.sync(force=True)
+    except Exception:  # pylint: disable=broad-except
+        return float("inf")
+    finally:
+        interface.reasoner.close()
+    return time.perf_counter() - start
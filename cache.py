@@ -0,0 +1,270 @@
+"""Caches of reasoning results and of entity handles"""
+import hashlib
+import json
+import os
+
+from collections import defaultdict, OrderedDict
+from typing import Dict, List, Optional, Set, Tuple, Any, Iterable
+
+import owlready2
+from owlready2.reasoning import _apply_reasoning_results, _apply_inferred_obj_relations, \
+                                _apply_inferred_data_relations
+from owlutils.reasoner import PYTHON_NAME, _INFERRENCES_ONTOLOGY
+
+Row = Tuple[int, int, Any, Any]
+
+HASH_SIZE = 2 ** 128
+
+_IS_A = {
+    owlready2.rdf_type: "individual",
+    owlready2.rdfs_subclassof: "class",
+    owlready2.rdfs_subpropertyof: "property",
+}
+_EQUIVALENT_TO = {
+    owlready2.owl_equivalentclass: "class",
+    owlready2.owl_equivalentproperty: "property",
+}
+
+
+class ReasoningCache:
+    """
+    Store on disk the triples inferred by the reasoner, indexed by a fingerprint of
+    the asserted triples of the world and of the plugin state (e.g. the saved rules).
+    When the world comes back to a known state, the cached triples are asserted
+    instead of running the reasoner. Least recently used entries are evicted.
+    The triples added by the reasoner, or by the cache, since the cache was created are
+    kept in derived and left out of the fingerprint, so that a state is recognized
+    whatever has been inferred in the meantime
+    """
+
+    def __init__(self, directory: str, max_entries: int = 64):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.derived: Set[Row] = set()
+        os.makedirs(directory, exist_ok=True)
+
+    # Fingerprint
+
+    def fingerprint(self, world: owlready2.World, state: str = "",
+                    ontologies: Iterable[str] = (_INFERRENCES_ONTOLOGY,)) -> str:
+        """
+        Return a digest of the asserted triples of the world and of the input state string.
+        The triples in derived and the ones of the given ontologies, where the inferred
+        facts are asserted, are skipped. Blank nodes are identified by their content and
+        entities by their iri, so the digest does not depend on the storids assigned by owlready2
+        """
+        graphs = [world.ontologies[iri].graph.c for iri in ontologies if iri in world.ontologies]
+        rows = world.graph.db.cursor().execute(
+            f"SELECT s, p, o, d FROM quads WHERE c NOT IN ({','.join('?' * len(graphs))})", graphs)
+        derived = self.derived
+        return digest(world, (row for row in rows if row not in derived), state)
+
+    # Storage
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Optional[List[list]]:
+        """Return the triples cached for a fingerprint, or None"""
+        path = self.__path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                triples = json.load(file)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return triples
+
+    def store(self, key: str, triples: List[list]) -> None:
+        """Save the triples inferred for a fingerprint and evict the oldest entries"""
+        path = self.__path(key)
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(triples, file)
+            os.replace(path + ".tmp", path)
+        except (OSError, TypeError, ValueError):
+            return
+
+        entries = [os.path.join(self.directory, x) for x in os.listdir(self.directory)
+                   if x.endswith(".json")]
+        entries.sort(key=os.path.getmtime)
+        for entry in entries[:max(0, len(entries) - self.max_entries)]:
+            os.unlink(entry)
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        for entry in os.listdir(self.directory):
+            if entry.endswith(".json"):
+                os.unlink(os.path.join(self.directory, entry))
+
+    # Triples
+
+    @staticmethod
+    def snapshot(ontology: owlready2.Ontology) -> Set[Row]:
+        """Return the triples asserted in an ontology"""
+        return set(ontology.graph._iter_triples())
+
+    def inferred(self, ontology: owlready2.Ontology, before: Set[Row]) -> Optional[List[list]]:
+        """
+        Return the triples added to the ontology since the snapshot, as iris, adding them
+        to derived. Return None if they cannot be cached, i.e. they reference blank nodes
+        """
+        world = ontology.world
+        added = set(ontology.graph._iter_triples()) - before
+        self.derived.update(added)
+        triples = []
+        for s, p, o, d in added:
+            if s < 0 or (d is None and o < 0):
+                return None
+            if d is None:
+                triples.append([world._unabbreviate(s), world._unabbreviate(p),
+                                world._unabbreviate(o), None])
+            else:
+                triples.append([world._unabbreviate(s), world._unabbreviate(p), o,
+                                d if isinstance(d, str) else world._unabbreviate(d)])
+        return triples
+
+    def apply(self, ontology: owlready2.Ontology, triples: List[list], debug: int = 0) -> None:
+        """
+        Assert cached triples into the ontology, updating the loaded python entities,
+        and add them to derived
+        """
+        world = ontology.world
+        new_parents = defaultdict(list)
+        new_equivs = defaultdict(list)
+        entity_2_type = {}
+        obj_relations, data_relations = [], []
+
+        for s_iri, p_iri, o, d in triples:
+            s, p = world._abbreviate(s_iri), world._abbreviate(p_iri)
+
+            if d is not None:
+                d = d if d.startswith("@") else world._abbreviate(d)
+                data_relations.append((s, world._get_by_storid(p), o, d))
+                self.derived.add((s, p, o, d))
+                continue
+
+            self.derived.add((s, p, world._abbreviate(o), None))
+            if p in _IS_A:
+                if s not in new_parents:
+                    new_parents[s].extend(x for x in world._get_obj_triples_sp_o(s, p) if x > 300)
+                new_parents[s].append(world._abbreviate(o))
+                entity_2_type[s] = _IS_A[p]
+            elif p in _EQUIVALENT_TO:
+                new_equivs[s].append(world._abbreviate(o))
+                entity_2_type[s] = _EQUIVALENT_TO[p]
+            else:
+                obj_relations.append((s, world._get_by_storid(p), world._abbreviate(o)))
+
+        _apply_reasoning_results(world, ontology, debug, new_parents, new_equivs, entity_2_type)
+        _apply_inferred_obj_relations(world, ontology, debug, obj_relations)
+        _apply_inferred_data_relations(world, ontology, debug, data_relations)
+
+
+class EntityCache:
+    """
+    Bounded least recently used map from names to the entities of an ontology.
+    A cached entity is discarded when owlready2 no longer knows it, e.g. because it has
+    been destroyed, or when its iri changed, so a destroyed, recreated or renamed entity
+    is looked up again. Names not found are not cached, since the entity may be created
+    afterwards, and neither are values other than entities, e.g. ontology attributes
+    """
+
+    def __init__(self, world: owlready2.World, max_entries: int = 4096):
+        self.world = world
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[Any, str]]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the entity cached for a name, or None"""
+        entry = self.entries.get(name)
+        if entry is not None:
+            entity, iri = entry
+            if self.world._entities.get(entity.storid) is entity and entity.iri == iri:
+                self.entries.move_to_end(name)
+                self.hits += 1
+                return entity
+            del self.entries[name]
+        self.misses += 1
+        return None
+
+    def put(self, name: str, entity: Any) -> None:
+        """Cache the entity of a name, evicting the least recently used one if full"""
+        if not isinstance(entity, (owlready2.EntityClass, owlready2.Thing)):
+            return
+        self.entries[name] = (entity, entity.iri)
+        self.entries.move_to_end(name)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, *names: str) -> None:
+        """Forget the given names, or every name if none is given"""
+        if not names:
+            self.entries.clear()
+        for name in names:
+            self.entries.pop(name, None)
+
+
+def digest(world: owlready2.World, rows: Iterable[Row], state: str = "") -> str:
+    """
+    Return an order independent digest of the triples and of the input state string,
+    the rows describing the blank nodes must be included in the input triples
+    """
+    python_name = world._abbreviate(PYTHON_NAME)
+    bnodes: Dict[int, List[Row]] = defaultdict(list)
+    named: List[Row] = []
+    storids: Set[int] = set()
+
+    for row in rows:
+        s, p, o, d = row
+        if p == python_name:
+            continue
+        if s < 0:
+            bnodes[s].append(row)
+        else:
+            named.append(row)
+            storids.add(s)
+        storids.add(p)
+        if d is None:
+            storids.add(o)
+        elif isinstance(d, int):
+            storids.add(d)
+
+    iris = resolve(world, storids)
+    labels: Dict[int, str] = {}
+
+    def label(node: Any, d: Any) -> str:
+        if d is not None:
+            return f"{node!r}^^{iris.get(d, d)}"
+        if node >= 0:
+            return iris.get(node, str(node))
+        if node not in labels:
+            labels[node] = "_:cycle"
+            content = sorted(f"{iris.get(p, p)} {label(o, d)}" for _, p, o, d in bnodes[node])
+            labels[node] = "_:" + hashlib.blake2b("\n".join(content).encode("utf-8"),
+                                                  digest_size=16).hexdigest()
+        return labels[node]
+
+    total = int.from_bytes(hashlib.blake2b(state.encode("utf-8"), digest_size=16).digest(), "big")
+    for s, p, o, d in named:
+        line = f"{label(s, None)} {iris.get(p, p)} {label(o, d)}"
+        value = hashlib.blake2b(line.encode("utf-8"), digest_size=16).digest()
+        total = (total + int.from_bytes(value, "big")) % HASH_SIZE
+
+    return f"{total:032x}"
+
+
+def resolve(world: owlready2.World, storids: Iterable[int], batch_size: int = 500) -> Dict[int, str]:
+    """Return the iris of the given storids, reading the resources table in batches"""
+    storids = [x for x in storids if x > 0]
+    iris: Dict[int, str] = {}
+    for i in range(0, len(storids), batch_size):
+        batch = storids[i:i + batch_size]
+        iris.update(world.graph.execute(
+            f"SELECT storid, iri FROM resources WHERE storid IN ({','.join('?' * len(batch))})",
+            batch))
+    return iris
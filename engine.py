@@ -0,0 +1,647 @@
+"""Pure python forward-chaining reasoner for the OWL RL and SWRL fragment used by owlutils"""
+import sys
+import threading
+
+from collections import defaultdict
+from typing import Dict, Set, List, Tuple, Any, Optional, Iterable
+
+import owlready2
+from owlready2.reasoning import _apply_reasoning_results, _apply_inferred_obj_relations, \
+                                _apply_inferred_data_relations
+from owlutils.reasoner import Reasoner, PelletReasoner, ReasoningCancelled, Module, destination
+from owlutils.tbox import tbox_fingerprint
+
+Literal = Tuple[Any, Any]
+Condition = Tuple[int, int, Any, int]
+
+RESTRICTIONS = {owlready2.SOME, owlready2.ONLY, owlready2.VALUE,
+                owlready2.MIN, owlready2.MAX, owlready2.EXACTLY}
+THING = owlready2.Thing.storid
+
+
+class NativeReasoner(Reasoner):
+    """
+    Materialize in process the inferences needed by owlutils: subclass, equivalent class,
+    domain, range, sub-property, inverse, symmetric and transitive property propagation,
+    class membership for classes defined by restrictions (cardinalities are evaluated on
+    the values closed by the exactly restrictions asserted on individuals, assuming unique
+    names as YANGOntology.update does) and SWRL rules made of class and property atoms.
+    The engine realizes individuals, it neither classifies the class hierarchy nor checks
+    the consistency of the ontology. Axioms outside this fragment are reported in
+    self.unsupported and the classification is delegated to the fallback reasoner.
+    The indexed TBox is kept between runs and reused while the TBox fingerprint is unchanged
+    """
+
+    def __init__(self, fallback: Optional[Reasoner] = None):
+        super().__init__()
+        self.fallback: Reasoner = PelletReasoner() if fallback is None else fallback
+        self.unsupported: List[str] = []
+        self.schema: Optional[Tuple[str, TripleTables]] = None
+
+    def cancel(self) -> None:
+        super().cancel()
+        self.fallback.cancel()
+
+    def reason(self, ontology: Optional[owlready2.Ontology] = None, debug: int = 0,
+               module: Optional[Module] = None) -> None:
+        world = owlready2.default_world if ontology is None else ontology.world
+        version = tbox_fingerprint(world)
+        schema = None
+        if self.schema is not None and self.schema[0] == version and self.schema[1].world is world:
+            schema = self.schema[1]
+
+        with self.phase("load"):
+            tables = TripleTables(world, schema, module)
+        self.unsupported = tables.unsupported
+        self.schema = None if tables.unsupported else (version, tables)
+
+        if self.unsupported:
+            if debug:
+                print("* owlutils * Axioms not supported by the native reasoner:", file=sys.stderr)
+                for axiom in self.unsupported:
+                    print(f"    {axiom}", file=sys.stderr)
+            self.fallback.cancelled.clear()
+            self.fallback.verbose = self.verbose
+            self.fallback.phases = self.phases
+            self.fallback.reason(ontology, debug, module)
+            self.log = self.fallback.log
+            return
+
+        with self.phase("materialize"):
+            tables.materialize(self.cancelled)
+        with self.phase("apply"):
+            tables.apply(destination(world, ontology), debug)
+
+
+class TripleTables:
+    """
+    Indexed triple tables of a world, and the rules used to saturate them.
+    The classes and properties can be shared with the tables built on the same TBox.
+    If module is given only the facts of its subjects are loaded and applied
+    """
+
+    def __init__(self, world: owlready2.World, schema: Optional["TripleTables"] = None,
+                 module: Optional[Module] = None):
+        self.world = world
+        self.module = module
+        self.unsupported: List[str] = []
+
+        self.classes: Set[int] = set()
+        self.top: Set[int] = {THING}
+        self.supers: Dict[int, Set[int]] = defaultdict(set)
+        self.told: Dict[int, List[Condition]] = defaultdict(list)
+        self.definitions: Dict[int, List[List[Condition]]] = defaultdict(list)
+
+        self.object_properties: Set[int] = set()
+        self.data_properties: Set[int] = set()
+        self.super_properties: Dict[int, Set[int]] = defaultdict(set)
+        self.inverses: Dict[int, Set[int]] = defaultdict(set)
+        self.symmetric: Set[int] = set()
+        self.transitive: Set[int] = set()
+        self.domains: Dict[int, Set[int]] = defaultdict(set)
+        self.ranges: Dict[int, Set[int]] = defaultdict(set)
+        self.rules: List[Tuple[str, list, list]] = []
+
+        self.types: Dict[int, Set[int]] = defaultdict(set)
+        self.members: Dict[int, Set[int]] = defaultdict(set)
+        self.objs: Dict[int, Dict[int, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self.objs_inv: Dict[int, Dict[int, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self.datas: Dict[int, Dict[int, Set[Literal]]] = defaultdict(lambda: defaultdict(set))
+        self.closed: Dict[Tuple[int, int], int] = {}
+
+        self.inferred_types: Set[int] = set()
+        self.inferred_objs: Set[Tuple[int, int, int]] = set()
+        self.inferred_datas: Set[Tuple[int, int, Any, Any]] = set()
+        self.asserted: Set[tuple] = set()
+
+        if schema is None:
+            self._load_tbox()
+        else:
+            self._share_tbox(schema)
+
+        for rule in self.world.rules():
+            self._load_rule(rule)
+
+        if not self.unsupported:
+            self._load_abox()
+
+    # Loading
+
+    def _load_tbox(self) -> None:
+        """Index classes and properties"""
+        for owl_class in self.world.classes():
+            self.classes.add(owl_class.storid)
+
+        for owl_class in self.world.classes():
+            for parent in owl_class.is_a:
+                self._load_superclass(owl_class, parent)
+
+            for equivalent in owl_class.equivalent_to:
+                if equivalent is owlready2.Thing:
+                    self.top.add(owl_class.storid)
+                elif isinstance(equivalent, owlready2.ThingClass):
+                    self.supers[owl_class.storid].add(equivalent.storid)
+                    self.supers[equivalent.storid].add(owl_class.storid)
+                else:
+                    definition = self._conditions(equivalent)
+                    if definition is None:
+                        self.unsupported.append(f"{owl_class} equivalent to {equivalent}")
+                    else:
+                        self.definitions[owl_class.storid].append(definition)
+
+        for disjoint in self.world.disjoint_classes():
+            self.unsupported.append(f"disjoint classes {disjoint.entities}")
+
+        self._close_supers()
+
+        for prop in self.world.properties():
+            self._load_property(prop)
+
+    def _share_tbox(self, schema: "TripleTables") -> None:
+        """Reuse the classes and properties indexed by tables built on the same TBox"""
+        self.classes = schema.classes
+        self.top = schema.top
+        self.supers = schema.supers
+        self.told.update((key, value) for key, value in schema.told.items()
+                         if key in schema.classes)
+        self.definitions = schema.definitions
+
+        self.object_properties = schema.object_properties
+        self.data_properties = schema.data_properties
+        self.super_properties = schema.super_properties
+        self.inverses = schema.inverses
+        self.symmetric = schema.symmetric
+        self.transitive = schema.transitive
+        self.domains = schema.domains
+        self.ranges = schema.ranges
+
+    def _load_superclass(self, owl_class: owlready2.ThingClass, parent: Any) -> None:
+        """Index a superclass axiom"""
+        if isinstance(parent, owlready2.ThingClass):
+            self.supers[owl_class.storid].add(parent.storid)
+            return
+
+        conditions = self._conditions(parent)
+        if conditions is None:
+            self.unsupported.append(f"{owl_class} subclass of {parent}")
+            return
+
+        for condition in conditions:
+            if condition[0] == -1:
+                self.supers[owl_class.storid].add(condition[2])
+            else:
+                self.told[owl_class.storid].append(condition)
+
+    def _conditions(self, construct: Any) -> Optional[List[Condition]]:
+        """
+        Translate a class expression into a conjunction of conditions
+        (restriction type, property, value, cardinality), a named class
+        is encoded with restriction type -1. Return None if unsupported
+        """
+        if isinstance(construct, owlready2.ThingClass):
+            return [(-1, 0, construct.storid, 0)]
+
+        if isinstance(construct, owlready2.And):
+            conditions = []
+            for item in construct.Classes:
+                condition = self._conditions(item)
+                if condition is None:
+                    return None
+                conditions.extend(condition)
+            return conditions
+
+        if isinstance(construct, owlready2.Restriction) and construct.type in RESTRICTIONS:
+            prop = construct.property
+            if not isinstance(prop, (owlready2.ObjectPropertyClass, owlready2.DataPropertyClass)):
+                return None
+
+            value = construct.value
+            if construct.type == owlready2.VALUE:
+                if isinstance(value, owlready2.Thing):
+                    value = value.storid
+                else:
+                    value = owlready2.base.to_literal(value)
+            elif isinstance(prop, owlready2.DataPropertyClass):
+                value = THING
+            elif value is None or value is owlready2.Thing:
+                value = THING
+            elif isinstance(value, owlready2.ThingClass):
+                value = value.storid
+            else:
+                return None
+
+            return [(construct.type, prop.storid, value, construct.cardinality or 0)]
+
+        return None
+
+    def _close_supers(self) -> None:
+        """Compute the reflexive and transitive closure of the named superclasses"""
+        closure: Dict[int, Set[int]] = defaultdict(set)
+        for owl_class in self.classes:
+            stack, seen = [owl_class], {owl_class}
+            while stack:
+                for parent in self.supers.get(stack.pop(), ()):
+                    if parent not in seen:
+                        seen.add(parent)
+                        stack.append(parent)
+            closure[owl_class] = seen - self.top
+        self.supers = closure
+
+    def _load_property(self, prop: owlready2.PropertyClass) -> None:
+        """Index a property characteristics, domain and range"""
+        if isinstance(prop, owlready2.AnnotationPropertyClass):
+            return
+
+        if isinstance(prop, owlready2.DataPropertyClass):
+            self.data_properties.add(prop.storid)
+        else:
+            self.object_properties.add(prop.storid)
+
+        for parent in prop.is_a:
+            if isinstance(parent, owlready2.PropertyClass) and parent.storid > 300:
+                self.super_properties[prop.storid].add(parent.storid)
+            elif parent is owlready2.TransitiveProperty:
+                self.transitive.add(prop.storid)
+            elif parent is owlready2.SymmetricProperty:
+                self.symmetric.add(prop.storid)
+            elif parent is owlready2.ReflexiveProperty:
+                self.unsupported.append(f"reflexive property {prop}")
+
+        if getattr(prop, "property_chain", None):
+            self.unsupported.append(f"property chain of {prop}")
+
+        if isinstance(prop, owlready2.ObjectPropertyClass) and prop.inverse_property is not None:
+            self.inverses[prop.storid].add(prop.inverse_property.storid)
+            self.inverses[prop.inverse_property.storid].add(prop.storid)
+
+        for attribute, index in (("domain", self.domains), ("range", self.ranges)):
+            for item in getattr(prop, attribute):
+                if isinstance(prop, owlready2.DataPropertyClass) and attribute == "range":
+                    continue
+                conditions = self._conditions(item)
+                if conditions is None or any(condition[0] != -1 for condition in conditions):
+                    self.unsupported.append(f"{attribute} of {prop}: {item}")
+                else:
+                    index[prop.storid].update(condition[2] for condition in conditions)
+
+    def _load_rule(self, rule: owlready2.Imp) -> None:
+        """Index a SWRL rule made of class and property atoms"""
+        try:
+            body = [self._atom(atom) for atom in rule.body]
+            head = [self._atom(atom) for atom in rule.head]
+        except ValueError as err:
+            self.unsupported.append(f"rule {rule}: {err}")
+            return
+
+        bound = {argument for atom in body for argument in atom[2:] if isinstance(argument, str)}
+        unbound = {argument for atom in head for argument in atom[2:]
+                   if isinstance(argument, str) and argument not in bound}
+
+        if unbound:
+            self.unsupported.append(f"rule {rule}: unbound variables {unbound}")
+        else:
+            self.rules.append((str(rule), body, head))
+
+    @staticmethod
+    def _argument(argument: Any) -> Any:
+        """Variables are encoded as their name, individuals as their storid, literals as pairs"""
+        if isinstance(argument, owlready2.Variable):
+            return argument.name
+        if isinstance(argument, owlready2.Thing):
+            return argument.storid
+        return owlready2.base.to_literal(argument)
+
+    def _atom(self, atom: Any) -> tuple:
+        """Translate a SWRL atom into a tuple (kind, predicate, *arguments)"""
+        arguments = [self._argument(argument) for argument in atom.arguments]
+
+        if isinstance(atom, owlready2.ClassAtom) and \
+           isinstance(atom.class_predicate, owlready2.ThingClass):
+            return ("class", atom.class_predicate.storid, *arguments)
+        if isinstance(atom, owlready2.IndividualPropertyAtom):
+            return ("obj", atom.property_predicate.storid, *arguments)
+        if isinstance(atom, owlready2.DatavaluedPropertyAtom):
+            return ("data", atom.property_predicate.storid, *arguments)
+
+        raise ValueError(f"unsupported atom {atom}")
+
+    def _load_abox(self) -> None:
+        """Index asserted types and property values, then propagate them"""
+        rdf_type = owlready2.rdf_type
+        types, objs, datas = [], [], []
+
+        subjects = None if self.module is None else self.module.subjects
+
+        for s, p, o in self.world._get_obj_triples_spo_spo(None, None, None):
+            if s < 0 or (subjects is not None and s not in subjects):
+                continue
+            if p == rdf_type:
+                if o in self.classes:
+                    types.append((s, o))
+                elif o == owlready2.owl_named_individual:
+                    self.types.setdefault(s, set())
+                elif o < 0:
+                    self._load_individual_restriction(s, o)
+            elif p in self.object_properties and o > 0:
+                objs.append((s, p, o))
+
+        for s, p, o, d in self.world._get_data_triples_spod_spod(None, None, None, None):
+            if s > 0 and p in self.data_properties and (subjects is None or s in subjects):
+                datas.append((s, p, o, d))
+
+        self.asserted.update(("type",) + fact for fact in types)
+        self.asserted.update(("obj",) + fact for fact in objs)
+        self.asserted.update(("data",) + fact for fact in datas)
+
+        for s, o in types:
+            self.add_type(s, o)
+        for s, p, o in objs:
+            self.add_obj(s, p, o)
+        for s, p, o, d in datas:
+            self.add_data(s, p, o, d)
+
+    def _load_individual_restriction(self, individual: int, bnode: int) -> None:
+        """Index a restriction asserted on an individual"""
+        restriction = self.world._parse_bnode(bnode)
+        conditions = self._conditions(restriction)
+
+        if conditions is None:
+            self.unsupported.append(f"individual {self.world._unabbreviate(individual)} "
+                                    f"is a {restriction}")
+            return
+
+        for condition in conditions:
+            restriction_type, prop, _, cardinality = condition
+            self.told[individual].append(condition)
+            if restriction_type in (owlready2.EXACTLY, owlready2.MAX):
+                self.closed[(individual, prop)] = cardinality
+
+    # Facts
+
+    def add_type(self, individual: int, owl_class: int) -> bool:
+        """Add a class and its superclasses to the types of an individual"""
+        if owl_class in self.types[individual]:
+            return False
+
+        for parent in self.supers.get(owl_class, (owl_class,)):
+            if parent not in self.types[individual]:
+                self.types[individual].add(parent)
+                self.members[parent].add(individual)
+                if ("type", individual, parent) not in self.asserted:
+                    self.inferred_types.add(individual)
+        return True
+
+    def add_obj(self, s: int, p: int, o: int) -> bool:
+        """Add an object property value and propagate it"""
+        if o in self.objs[p][s]:
+            return False
+
+        self.objs[p][s].add(o)
+        self.objs_inv[p][o].add(s)
+        if ("obj", s, p, o) not in self.asserted:
+            self.inferred_objs.add((s, p, o))
+
+        for owl_class in self.domains.get(p, ()):
+            self.add_type(s, owl_class)
+        for owl_class in self.ranges.get(p, ()):
+            self.add_type(o, owl_class)
+        for parent in self.super_properties.get(p, ()):
+            self.add_obj(s, parent, o)
+        for inverse in self.inverses.get(p, ()):
+            self.add_obj(o, inverse, s)
+        if p in self.symmetric:
+            self.add_obj(o, p, s)
+        return True
+
+    def add_data(self, s: int, p: int, o: Any, d: Any) -> bool:
+        """Add a data property value and propagate it"""
+        if (o, d) in self.datas[p][s]:
+            return False
+
+        self.datas[p][s].add((o, d))
+        if ("data", s, p, o, d) not in self.asserted:
+            self.inferred_datas.add((s, p, o, d))
+
+        for owl_class in self.domains.get(p, ()):
+            self.add_type(s, owl_class)
+        for parent in self.super_properties.get(p, ()):
+            self.add_data(s, parent, o, d)
+        return True
+
+    def values(self, individual: int, prop: int) -> Set[Any]:
+        """Return the known values of a property for an individual"""
+        if prop in self.data_properties:
+            return self.datas[prop].get(individual, set())
+        return self.objs[prop].get(individual, set())
+
+    # Inference
+
+    def materialize(self, cancelled: Optional[threading.Event] = None) -> None:
+        """Apply the inference rules until a fixpoint is reached"""
+        changed = True
+        while changed:
+            if cancelled is not None and cancelled.is_set():
+                raise ReasoningCancelled("Native reasoner cancelled")
+            changed = False
+            changed |= self._apply_told()
+            changed |= self._apply_transitive()
+            changed |= self._apply_definitions()
+            changed |= self._apply_rules()
+
+    def _told(self, individual: int) -> Iterable[Condition]:
+        """Return the conditions asserted on an individual or on its classes"""
+        yield from self.told.get(individual, ())
+        for owl_class in self.types.get(individual, ()):
+            yield from self.told.get(owl_class, ())
+
+    def _apply_told(self) -> bool:
+        """Apply allValuesFrom and hasValue superclass restrictions"""
+        changed = False
+        for individual in list(self.types):
+            for restriction_type, prop, value, _ in list(self._told(individual)):
+                if restriction_type == owlready2.ONLY and value not in self.top and \
+                   prop not in self.data_properties:
+                    for other in list(self.values(individual, prop)):
+                        changed |= self.add_type(other, value)
+                elif restriction_type == owlready2.VALUE:
+                    if prop in self.data_properties:
+                        changed |= self.add_data(individual, prop, *value)
+                    else:
+                        changed |= self.add_obj(individual, prop, value)
+        return changed
+
+    def _apply_transitive(self) -> bool:
+        """Close transitive properties"""
+        changed = False
+        for prop in self.transitive:
+            for s in list(self.objs[prop]):
+                stack = list(self.objs[prop][s])
+                reached = set(stack)
+                while stack:
+                    for o in self.objs[prop].get(stack.pop(), ()):
+                        if o not in reached:
+                            reached.add(o)
+                            stack.append(o)
+                for o in reached:
+                    changed |= self.add_obj(s, prop, o)
+        return changed
+
+    def _apply_definitions(self) -> bool:
+        """Add individuals to the classes defined by equivalent class expressions"""
+        changed = False
+        for owl_class, definitions in self.definitions.items():
+            for individual in list(self.types):
+                if owl_class in self.types[individual]:
+                    continue
+                if any(all(self._holds(individual, condition) for condition in definition)
+                       for definition in definitions):
+                    changed |= self.add_type(individual, owl_class)
+        return changed
+
+    def _is_a(self, value: Any, owl_class: int) -> bool:
+        """Return true if value is an instance of the class"""
+        return owl_class in self.top or owl_class in self.types.get(value, ())
+
+    def _holds(self, individual: int, condition: Condition) -> bool:
+        """Return true if the individual satisfies the condition"""
+        restriction_type, prop, value, cardinality = condition
+
+        if restriction_type == -1:
+            return value in self.top or value in self.types[individual]
+
+        if self._entailed(individual, condition):
+            return True
+
+        values = self.values(individual, prop)
+        matching = len([x for x in values if prop in self.data_properties or self._is_a(x, value)])
+        closed = self.closed.get((individual, prop)) == len(values)
+
+        if restriction_type == owlready2.SOME:
+            return matching > 0
+        if restriction_type == owlready2.VALUE:
+            return value in values
+        if restriction_type == owlready2.MIN:
+            return matching >= cardinality
+        if restriction_type == owlready2.MAX:
+            return closed and len(values) <= cardinality
+        if restriction_type == owlready2.EXACTLY:
+            return closed and matching >= cardinality >= len(values)
+        if restriction_type == owlready2.ONLY:
+            return closed and matching == len(values)
+        return False
+
+    def _entailed(self, individual: int, condition: Condition) -> bool:
+        """Return true if a told restriction of the individual entails the condition"""
+        restriction_type, prop, value, cardinality = condition
+
+        for told_type, told_prop, told_value, told_cardinality in self._told(individual):
+            if told_prop != prop:
+                continue
+
+            if told_type == owlready2.VALUE or restriction_type == owlready2.VALUE:
+                if told_type == restriction_type and told_value == value:
+                    return True
+                continue
+
+            narrower = value in self.top or value in self.supers.get(told_value, ())
+            wider = told_value in self.top or told_value in self.supers.get(value, ())
+            at_least = told_cardinality if told_type in (owlready2.MIN, owlready2.EXACTLY) else \
+                       1 if told_type == owlready2.SOME else 0
+            at_most = told_cardinality if told_type in (owlready2.MAX, owlready2.EXACTLY) else None
+
+            if restriction_type in (owlready2.SOME, owlready2.MIN) and narrower and \
+               at_least >= max(cardinality, 1 if restriction_type == owlready2.SOME else 0):
+                return True
+            if restriction_type == owlready2.MAX and wider and at_most is not None and \
+               at_most <= cardinality:
+                return True
+            if restriction_type == owlready2.ONLY and told_type == owlready2.ONLY and narrower:
+                return True
+        return False
+
+    def _apply_rules(self) -> bool:
+        """Fire the SWRL rules"""
+        changed = False
+        for _, body, head in self.rules:
+            for binding in self._match(body, 0, {}):
+                for kind, predicate, *arguments in head:
+                    arguments = [binding.get(x, x) if isinstance(x, str) else x for x in arguments]
+                    if kind == "class":
+                        changed |= self.add_type(arguments[0], predicate)
+                    elif kind == "obj":
+                        changed |= self.add_obj(arguments[0], predicate, arguments[1])
+                    else:
+                        changed |= self.add_data(arguments[0], predicate, *arguments[1])
+        return changed
+
+    def _match(self, body: list, index: int, binding: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+        """Enumerate the bindings satisfying the body atoms starting from index"""
+        if index == len(body):
+            yield dict(binding)
+            return
+
+        kind, predicate, *arguments = body[index]
+        bound = [binding.get(x, x) if isinstance(x, str) else x for x in arguments]
+        free = [isinstance(x, str) and x not in binding for x in arguments]
+
+        if kind == "class":
+            candidates = list(self.members.get(predicate, ())) if free[0] else \
+                         [bound[0]] if predicate in self.types.get(bound[0], ()) else []
+            pairs = [(x,) for x in candidates]
+        elif kind == "obj":
+            table = self.objs.get(predicate, {})
+            if not free[0]:
+                pairs = [(bound[0], o) for o in table.get(bound[0], ())]
+            elif not free[1]:
+                pairs = [(s, bound[1]) for s in self.objs_inv[predicate].get(bound[1], ())]
+            else:
+                pairs = [(s, o) for s, values in table.items() for o in values]
+        else:
+            table = self.datas.get(predicate, {})
+            subjects = table if free[0] else [bound[0]]
+            pairs = [(s, value) for s in subjects for value in table.get(s, ())]
+
+        for pair in pairs:
+            if any(not is_free and pair[i] != bound[i] for i, is_free in enumerate(free)):
+                continue
+            extended = dict(binding)
+            for i, is_free in enumerate(free):
+                if is_free:
+                    extended[arguments[i]] = pair[i]
+            yield from self._match(body, index + 1, extended)
+
+    # Results
+
+    def _most_specific(self, types: Set[int]) -> List[int]:
+        """Remove the classes that are strict superclasses of other classes in the set"""
+        return [owl_class for owl_class in types
+                if not any(owl_class in self.supers.get(other, ()) and
+                           other not in self.supers.get(owl_class, ())
+                           for other in types)]
+
+    def apply(self, ontology: owlready2.Ontology, debug: int = 0) -> None:
+        """Assert the inferred facts into the ontology"""
+        individuals = None if self.module is None else self.module.individuals
+
+        def applied(individual: int) -> bool:
+            return individuals is None or individual in individuals
+
+        new_parents = {individual: self._most_specific(self.types[individual])
+                       for individual in self.inferred_types if applied(individual)}
+        entity_2_type = {individual: "individual" for individual in new_parents}
+        _apply_reasoning_results(self.world, ontology, debug, new_parents, {}, entity_2_type)
+
+        relations = []
+        for s, p, o in self.inferred_objs:
+            if not applied(s):
+                continue
+            prop = self.world._get_by_storid(p)
+            if not self.world._has_obj_triple_spo(s, p, o) and \
+               (not prop._inverse_property or
+                not self.world._has_obj_triple_spo(o, prop._inverse_storid, s)):
+                relations.append((s, prop, o))
+        _apply_inferred_obj_relations(self.world, ontology, debug, relations)
+
+        relations = [(s, self.world._get_by_storid(p), o, d) for s, p, o, d in self.inferred_datas
+                     if applied(s)]
+        _apply_inferred_data_relations(self.world, ontology, debug, relations)
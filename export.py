@@ -0,0 +1,101 @@
+"""Streaming serialization of ontologies to N-Triples and N-Quads"""
+import gzip
+
+from typing import IO, Iterable, Iterator, List, Optional, Union
+
+import owlready2
+from owlutils.reasoner import PYTHON_NAME
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\"": "\\\"", "\n": "\\n", "\r": "\\r"})
+
+
+def export_triples(ontologies: Iterable[owlready2.Ontology], file: Union[str, IO[bytes]],
+                   quads: bool = False, comments: bool = True, compress: Optional[bool] = None,
+                   chunk_size: int = 10000, excluded: Optional[str] = None) -> int:
+    """
+    Write the triples asserted in the ontologies to file, a path or a binary file object,
+    as N-Triples, or as N-Quads named after the ontologies if quads is true. The triples
+    are read with a cursor and written in chunks of chunk_size lines, so the memory used
+    does not depend on the size of the ontologies. The output is compressed with gzip if
+    compress is true, or if it is None and file is a path ending in .gz. The rdfs:comment
+    annotations, e.g. the JSON data of YANGOntology individuals, are skipped unless
+    comments is true. If excluded is given, the triples found in the table of this name,
+    with columns s, p, o and d (NULL for object properties), are skipped too.
+    Return the number of triples written
+    """
+    if compress is None:
+        compress = isinstance(file, str) and file.endswith(".gz")
+
+    if isinstance(file, str):
+        with (gzip.open(file, "wb") if compress else open(file, "wb")) as output:
+            return _write(ontologies, output, quads, comments, chunk_size, excluded)
+
+    if compress:
+        with gzip.GzipFile(fileobj=file, mode="wb") as output:
+            return _write(ontologies, output, quads, comments, chunk_size, excluded)
+    return _write(ontologies, file, quads, comments, chunk_size, excluded)
+
+
+def _write(ontologies: Iterable[owlready2.Ontology], output: IO[bytes],
+           quads: bool, comments: bool, chunk_size: int, excluded: Optional[str]) -> int:
+    """Write the lines of the ontologies in chunks and return their number"""
+    count = 0
+    chunk: List[str] = []
+    for line in _lines(list(ontologies), quads, comments, excluded):
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            output.write("".join(chunk).encode("utf-8"))
+            count += len(chunk)
+            chunk.clear()
+    output.write("".join(chunk).encode("utf-8"))
+    return count + len(chunk)
+
+
+def _lines(ontologies: List[owlready2.Ontology], quads: bool, comments: bool,
+           excluded: Optional[str]) -> Iterator[str]:
+    """Yield the N-Triples or N-Quads lines of the ontologies, which must share a world"""
+    if not ontologies:
+        return
+
+    world = ontologies[0].world
+    graphs = {ontology.graph.c: f" <{ontology.base_iri.rstrip('#')}>" if quads else ""
+              for ontology in ontologies}
+    skipped = [world._abbreviate(PYTHON_NAME)]
+    if not comments:
+        skipped.append(owlready2.comment.storid)
+
+    where = f"c IN ({','.join('?' * len(graphs))}) AND p NOT IN ({','.join('?' * len(skipped))})"
+    arguments = (*graphs, *skipped)
+    objs_where, datas_where = where, where
+    if excluded is not None:
+        objs_where += (f" AND NOT EXISTS (SELECT 1 FROM {excluded} x "
+                       f"WHERE x.s=objs.s AND x.p=objs.p AND x.o=objs.o AND x.d IS NULL)")
+        datas_where += (f" AND NOT EXISTS (SELECT 1 FROM {excluded} x "
+                        f"WHERE x.s=datas.s AND x.p=datas.p AND x.o=datas.o AND x.d IS datas.d)")
+
+    for c, s, s_iri, p_iri, o, o_iri in world.graph.execute(
+            "SELECT c, s, rs.iri, rp.iri, o, ro.iri FROM objs "
+            "LEFT JOIN resources rs ON rs.storid=s JOIN resources rp ON rp.storid=p "
+            f"LEFT JOIN resources ro ON ro.storid=o WHERE {objs_where}", arguments):
+        yield f"{_node(s, s_iri)} <{p_iri}> {_node(o, o_iri)}{graphs[c]} .\n"
+
+    for c, s, s_iri, p_iri, o, d, d_iri in world.graph.execute(
+            "SELECT c, s, rs.iri, rp.iri, o, d, rd.iri FROM datas "
+            "LEFT JOIN resources rs ON rs.storid=s JOIN resources rp ON rp.storid=p "
+            f"LEFT JOIN resources rd ON rd.storid=d WHERE {datas_where}", arguments):
+        yield f"{_node(s, s_iri)} <{p_iri}> {_literal(o, d, d_iri)}{graphs[c]} .\n"
+
+
+def _node(storid: int, iri: Optional[str]) -> str:
+    """Return the N-Triples term of an entity or a blank node"""
+    return f"<{iri}>" if storid > 0 else f"_:n{-storid}"
+
+
+def _literal(value: object, datatype: object, datatype_iri: Optional[str]) -> str:
+    """Return the N-Triples term of a literal"""
+    text = str(value).translate(_ESCAPES)
+    if isinstance(datatype, str) and datatype.startswith("@"):
+        return f"\"{text}\"{datatype}"
+    if datatype_iri is not None:
+        return f"\"{text}\"^^<{datatype_iri}>"
+    return f"\"{text}\""
@@ -0,0 +1,119 @@
+"""Triples added and removed by the reasoner during a sync"""
+from typing import Any, Iterator, List, Set, Tuple
+
+import owlready2
+from owlutils.cache import Row
+
+
+class Delta:
+    """
+    Immutable set of triples, as storids and raw values, added to and removed
+    from a world by a sync. Data property values have a datatype, object
+    property values have None
+    """
+    def __init__(self, added: List[Row] = (), removed: List[Row] = ()):
+        self.added: Tuple[Row, ...] = tuple(added)
+        self.removed: Tuple[Row, ...] = tuple(removed)
+
+    def subjects(self) -> Set[int]:
+        """Return the storids of the subjects of the added or removed triples"""
+        return {row[0] for row in self.added} | {row[0] for row in self.removed}
+
+    def entities(self, world: owlready2.World) -> Iterator[Tuple[str, Any, Any, Any]]:
+        """
+        Yield ("+", subject, property, value) for every added triple and ("-", ...) for every
+        removed one, as owlready2 entities and python values. Builtin entities without a python
+        counterpart, e.g. rdf:type, are yielded as iris. Triples of blank nodes are skipped
+        """
+        def entity(storid: int) -> Any:
+            result = world._get_by_storid(storid) if storid > 0 else None
+            return world._unabbreviate(storid) if result is None else result
+
+        for sign, rows in (("+", self.added), ("-", self.removed)):
+            for s, p, o, d in rows:
+                if s < 0:
+                    continue
+                value = world._to_python(o, d) if d is not None else entity(o) if o > 0 else o
+                yield sign, entity(s), entity(p), value
+
+    def __bool__(self) -> bool:
+        return len(self) != 0
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed)
+
+    def __repr__(self) -> str:
+        return f"Delta(added={len(self.added)}, removed={len(self.removed)})"
+
+
+class ChangeFeed:
+    """
+    Compute the triples changed by the reasoner from the writes it applies: between begin
+    and end, temporary triggers log every triple inserted into or deleted from the quadstore,
+    and the log is reduced to the triples present after the sync and not before, or the
+    reverse. The cost depends on the size of the changes, not of the ontology. The delta is
+    passed to the subscribers after post_sync.
+    The triples added by the syncs since the world was opened, and not removed since, are
+    kept in the INFERRED table, identified by subject, property and value
+    """
+
+    LOG = "owlutils_feed"
+
+    INFERRED = "owlutils_inferred"
+
+    _TABLES = {"objs": "NULL", "datas": "{row}.d"}
+
+    def __init__(self, world: owlready2.World):
+        self.world = world
+        self.subscribers: List[Any] = []
+        world.graph.execute(f"CREATE TEMP TABLE IF NOT EXISTS {self.INFERRED} "
+                            f"(s INTEGER, p INTEGER, o BLOB, d INTEGER)")
+        world.graph.execute(f"CREATE INDEX IF NOT EXISTS temp.{self.INFERRED}_spo "
+                            f"ON {self.INFERRED} (s, p, o)")
+
+    def begin(self) -> None:
+        """Start logging the written triples, discarding the previous log"""
+        graph = self.world.graph
+        graph.execute(f"CREATE TEMP TABLE IF NOT EXISTS {self.LOG} "
+                      f"(sign INTEGER, data INTEGER, s INTEGER, p INTEGER, o BLOB, d INTEGER)")
+        graph.execute(f"DELETE FROM {self.LOG}")
+        for data, (table, datatype) in enumerate(self._TABLES.items()):
+            for event, rows in (("INSERT", (("NEW", 1),)), ("DELETE", (("OLD", -1),)),
+                                ("UPDATE", (("OLD", -1), ("NEW", 1)))):
+                values = ", ".join(f"({sign}, {data}, {row}.s, {row}.p, {row}.o, "
+                                   f"{datatype.format(row=row)})" for row, sign in rows)
+                graph.execute(f"CREATE TEMP TRIGGER IF NOT EXISTS {self.LOG}_{table}_{event.lower()} "
+                              f"AFTER {event} ON {table} "
+                              f"BEGIN INSERT INTO {self.LOG} VALUES {values}; END")
+
+    def end(self) -> Delta:
+        """Return the triples changed since begin, record them in INFERRED and stop logging"""
+        graph = self.world.graph
+        added, removed = [], []
+        for s, p, o, d, net, count in graph.execute(
+                f"SELECT s, p, o, d, net, CASE WHEN data THEN "
+                f"(SELECT COUNT(*) FROM datas WHERE datas.s=log.s AND datas.p=log.p "
+                f"AND datas.o=log.o AND datas.d IS log.d) ELSE "
+                f"(SELECT COUNT(*) FROM objs WHERE objs.s=log.s AND objs.p=log.p "
+                f"AND objs.o=log.o) END "
+                f"FROM (SELECT data, s, p, o, d, SUM(sign) AS net FROM {self.LOG} "
+                f"GROUP BY data, s, p, o, d) AS log WHERE net != 0").fetchall():
+            if count > 0 and count == net:
+                added.append((s, p, o, d))
+            elif count == 0:
+                removed.append((s, p, o, d))
+
+        for table in self._TABLES:
+            for event in ("insert", "delete", "update"):
+                graph.execute(f"DROP TRIGGER IF EXISTS {self.LOG}_{table}_{event}")
+        graph.execute(f"DROP TABLE IF EXISTS {self.LOG}")
+
+        graph.db.executemany(f"DELETE FROM {self.INFERRED} WHERE s=? AND p=? AND o=? AND d IS ?",
+                             removed)
+        graph.db.executemany(f"INSERT INTO {self.INFERRED} VALUES (?, ?, ?, ?)", added)
+        return Delta(added, removed)
+
+    def publish(self, delta: Delta) -> None:
+        """Invoke the subscribers with the delta"""
+        for subscriber in self.subscribers:
+            subscriber(delta)
@@ -0,0 +1,134 @@
+"""Concurrent execution of the lifecycle hooks of plugins along their dependencies"""
+import asyncio
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Set
+
+
+class HookScheduler:
+    """
+    Run a hook of every plugin as a dependency graph: a plugin starts when the plugins
+    it depends on, i.e. the instances of its dependencies classes, have completed.
+    Plugins declaring both thread_safe and io_bound run in a pool of workers threads, the
+    others run one at a time in the calling thread, in the order they were registered, while
+    the pool makes progress. Async hooks of thread_safe plugins run as concurrent tasks.
+    If a hook raises, no other hook is started and the exception is raised once the running
+    hooks have completed
+    """
+
+    def __init__(self, workers: int = 4):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="owlutils-hook")
+
+    def close(self) -> None:
+        """Wait for the running hooks and stop the worker threads"""
+        self.executor.shutdown(wait=True)
+
+    @staticmethod
+    def dependencies(plugins: Sequence[Any]) -> Dict[int, Set[int]]:
+        """
+        Return the positions of the plugins each plugin waits for, raising ValueError if
+        the dependencies are cyclic. Dependencies without registered instances are ignored
+        """
+        waits: Dict[int, Set[int]] = {
+            i: {j for j, other in enumerate(plugins)
+                if j != i and isinstance(other, tuple(plugin.dependencies))}
+            for i, plugin in enumerate(plugins)}
+
+        done: Set[int] = set()
+        while len(done) < len(plugins):
+            ready = {i for i in waits if i not in done and waits[i] <= done}
+            if not ready:
+                cycle = ", ".join(f"{type(plugins[i]).__name__}#{i}" for i in waits if i not in done)
+                raise ValueError(f"Cyclic plugin dependencies between {cycle}")
+            done |= ready
+        return waits
+
+    @staticmethod
+    def offloaded(plugin: Any) -> bool:
+        """Return true if the hooks of the plugin run in the worker threads"""
+        return plugin.thread_safe and plugin.io_bound
+
+    def run(self, plugins: Sequence[Any], hook: Callable[[Any], None]) -> None:
+        """Invoke hook(plugin) for every plugin"""
+        waits = self.dependencies(plugins)
+        pending: List[int] = list(range(len(plugins)))
+        running: Dict[Future, int] = {}
+        done: Set[int] = set()
+        error: List[BaseException] = []
+
+        def complete(futures: Set[Future]) -> None:
+            for future in futures:
+                position = running.pop(future)
+                if future.exception() is not None:
+                    error.append(future.exception())
+                    pending.clear()
+                else:
+                    done.add(position)
+
+        while pending or running:
+            complete({future for future in running if future.done()})
+            ready = [i for i in pending if waits[i] <= done]
+
+            for i in ready:
+                if self.offloaded(plugins[i]):
+                    pending.remove(i)
+                    running[self.executor.submit(hook, plugins[i])] = i
+
+            inline = [i for i in ready if not self.offloaded(plugins[i])]
+            if inline:
+                pending.remove(inline[0])
+                try:
+                    hook(plugins[inline[0]])
+                except BaseException as err:  # pylint: disable=broad-except
+                    error.append(err)
+                    pending.clear()
+                else:
+                    done.add(inline[0])
+            elif running:
+                complete(wait(running, return_when=FIRST_COMPLETED)[0])
+
+        if error:
+            raise error[0]
+
+    async def run_async(self, plugins: Sequence[Any], hook: Callable[[Any], Awaitable[None]]) -> None:
+        """Await hook(plugin) for every plugin"""
+        waits = self.dependencies(plugins)
+        pending: List[int] = list(range(len(plugins)))
+        running: Dict[asyncio.Future, int] = {}
+        done: Set[int] = set()
+        error: List[BaseException] = []
+
+        def complete(tasks: Set[asyncio.Future]) -> None:
+            for task in tasks:
+                position = running.pop(task)
+                if task.exception() is not None:
+                    error.append(task.exception())
+                    pending.clear()
+                else:
+                    done.add(position)
+
+        while pending or running:
+            complete({task for task in running if task.done()})
+            ready = [i for i in pending if waits[i] <= done]
+
+            for i in ready:
+                if plugins[i].thread_safe:
+                    pending.remove(i)
+                    running[asyncio.ensure_future(hook(plugins[i]))] = i
+
+            inline = [i for i in ready if not plugins[i].thread_safe]
+            if inline:
+                pending.remove(inline[0])
+                try:
+                    await hook(plugins[inline[0]])
+                except BaseException as err:  # pylint: disable=broad-except
+                    error.append(err)
+                    pending.clear()
+                else:
+                    done.add(inline[0])
+            elif running:
+                complete((await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED))[0])
+
+        if error:
+            raise error[0]
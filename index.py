@@ -0,0 +1,125 @@
+"""Hash indexes on the class membership and data property values of individuals"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+import owlready2
+from owlutils.store import track_writes, untrack_writes, written
+
+Value = Tuple[Any, Any]
+
+
+class EntityIndex:
+    """
+    Map classes to their asserted members and (property, value) pairs to the individuals
+    having them, for the data properties given. Only the asserted types are indexed, the
+    members of the subclasses are collected at lookup. The entries of an individual are
+    replaced by update, e.g. after map, and between begin and end the individuals whose
+    triples are written, e.g. by the reasoner, are recorded and updated at end.
+    An invalidated index is rebuilt from the quadstore on the next lookup
+    """
+
+    WRITES = "owlutils_indexed"
+
+    def __init__(self, world: owlready2.World, properties: Iterable[owlready2.DataPropertyClass] = ()):
+        self.world = world
+        self.properties: Set[int] = {prop.storid for prop in properties}
+        self.members: Dict[int, Set[int]] = defaultdict(set)
+        self.values: Dict[Tuple[int, Value], Set[int]] = defaultdict(set)
+        self.types_of: Dict[int, Set[int]] = {}
+        self.values_of: Dict[int, Set[Tuple[int, Value]]] = {}
+        self.stale: bool = True
+        self.tracking: bool = False
+        self.rebuilds: int = 0
+
+    def rebuild(self) -> None:
+        """Index every named individual of the world"""
+        self.members.clear()
+        self.values.clear()
+        self.types_of.clear()
+        self.values_of.clear()
+        graph = self.world.graph
+
+        individuals = {s for s, in graph.execute(
+            "SELECT s FROM objs WHERE p=? AND o=?",
+            (owlready2.rdf_type, owlready2.owl_named_individual))}
+
+        for s, o in graph.execute("SELECT s, o FROM objs WHERE p=? AND s>0 AND o>0",
+                                  (owlready2.rdf_type,)):
+            if s in individuals:
+                self.types_of.setdefault(s, set()).add(o)
+                self.members[o].add(s)
+
+        for prop in self.properties:
+            for s, o, d in graph.execute("SELECT s, o, d FROM datas WHERE p=?", (prop,)):
+                if s in individuals:
+                    self.values_of.setdefault(s, set()).add((prop, (o, d)))
+                    self.values[prop, (o, d)].add(s)
+
+        self.stale = False
+        self.rebuilds += 1
+
+    def invalidate(self) -> None:
+        """Rebuild the index on the next lookup"""
+        self.stale = True
+
+    def begin(self) -> None:
+        """Record the storids written until end, unless the index is rebuilt anyway"""
+        self.tracking = not self.stale
+        if self.tracking:
+            track_writes(self.world, self.WRITES)
+
+    def end(self) -> None:
+        """Update the individuals written since begin and stop recording"""
+        if not self.tracking:
+            return
+        storids = written(self.world, self.WRITES)
+        untrack_writes(self.world, self.WRITES)
+        self.tracking = False
+        self.update(*(storid for storid in storids if storid > 0))
+
+    def update(self, *storids: int) -> None:
+        """Read again the types and the indexed values of the individuals"""
+        if self.stale:
+            return
+
+        world = self.world
+        for storid in storids:
+            self.discard(storid)
+            if not world._has_obj_triple_spo(storid, owlready2.rdf_type,
+                                             owlready2.owl_named_individual):
+                continue
+
+            types = {o for o in world._get_obj_triples_sp_o(storid, owlready2.rdf_type) if o > 0}
+            self.types_of[storid] = types
+            for owl_class in types:
+                self.members[owl_class].add(storid)
+
+            values = {(prop, value) for prop in self.properties
+                      for value in world._get_data_triples_sp_od(storid, prop)}
+            self.values_of[storid] = values
+            for key in values:
+                self.values[key].add(storid)
+
+    def discard(self, storid: int) -> None:
+        """Remove the entries of an individual, e.g. before it is destroyed"""
+        for owl_class in self.types_of.pop(storid, ()):
+            self.members[owl_class].discard(storid)
+        for key in self.values_of.pop(storid, ()):
+            self.values[key].discard(storid)
+
+    def instances(self, owl_class: owlready2.ThingClass) -> Set[int]:
+        """Return the individuals asserted to be members of the class or of its subclasses"""
+        if self.stale:
+            self.rebuild()
+        result: Set[int] = set()
+        for descendant in owl_class.descendants():
+            result.update(self.members.get(descendant.storid, ()))
+        return result
+
+    def having(self, prop: owlready2.DataPropertyClass, value: Any) -> Optional[Set[int]]:
+        """Return the individuals having value for prop, or None if prop is not indexed"""
+        if prop.storid not in self.properties:
+            return None
+        if self.stale:
+            self.rebuild()
+        return self.values.get((prop.storid, self.world._to_rdf(value)), set())
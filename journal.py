@@ -0,0 +1,98 @@
+"""Keep track of the entities changed between two classifications of an ontology"""
+from typing import FrozenSet, Iterable, Set
+
+import owlready2
+
+
+class ChangeSet:
+    """Immutable set of changes collected by a ChangeJournal"""
+    def __init__(self,
+                 individuals: Iterable[str] = (),
+                 classes: Iterable[str] = (),
+                 properties: Iterable[str] = (),
+                 rules: Iterable[str] = (),
+                 complete: bool = False):
+        self.individuals: FrozenSet[str] = frozenset(individuals)
+        self.classes: FrozenSet[str] = frozenset(classes)
+        self.properties: FrozenSet[str] = frozenset(properties)
+        self.rules: FrozenSet[str] = frozenset(rules)
+        self.complete: bool = complete
+
+    def entities(self) -> FrozenSet[str]:
+        """Return the iris of every changed entity"""
+        return self.individuals | self.classes | self.properties
+
+    def __bool__(self) -> bool:
+        return self.complete or len(self) != 0
+
+    def __len__(self) -> int:
+        return len(self.individuals) + len(self.classes) + len(self.properties) + len(self.rules)
+
+    def __repr__(self) -> str:
+        return (f"ChangeSet(individuals={len(self.individuals)}, classes={len(self.classes)}, "
+                f"properties={len(self.properties)}, rules={len(self.rules)}, "
+                f"complete={self.complete})")
+
+
+class ChangeJournal:
+    """
+    Collect the iris of individuals, classes and properties added or changed
+    since the last sync. A complete journal means that the whole ontology has to be
+    classified, e.g. before the first sync or after an ontology has been imported
+    """
+    def __init__(self):
+        self.individuals: Set[str] = set()
+        self.classes: Set[str] = set()
+        self.properties: Set[str] = set()
+        self.rules: Set[str] = set()
+        self.complete: bool = True
+
+    def record(self, *entities: owlready2.EntityClass) -> None:
+        """Record that the input entities have been added or changed"""
+        for entity in entities:
+            if isinstance(entity, owlready2.PropertyClass):
+                self.properties.add(entity.iri)
+            elif isinstance(entity, owlready2.ThingClass):
+                self.classes.add(entity.iri)
+            elif isinstance(entity, owlready2.Thing):
+                self.individuals.add(entity.iri)
+
+    def record_rule(self, rule_expr: str) -> None:
+        """Record that a rule has been added or removed"""
+        self.rules.add(rule_expr)
+
+    def record_all(self) -> None:
+        """Record that the whole ontology has to be classified again"""
+        self.complete = True
+
+    def is_empty(self) -> bool:
+        """Return true if nothing changed since the last flush"""
+        return not self.complete and \
+               not self.individuals and \
+               not self.classes and \
+               not self.properties and \
+               not self.rules
+
+    def flush(self) -> ChangeSet:
+        """Return the recorded changes and empty the journal"""
+        changes = ChangeSet(self.individuals, self.classes, self.properties,
+                            self.rules, self.complete)
+        self.individuals, self.classes, self.properties, self.rules = set(), set(), set(), set()
+        self.complete = False
+        return changes
+
+    def copy(self) -> "ChangeJournal":
+        """Return a copy of the journal"""
+        journal = ChangeJournal()
+        journal.merge(ChangeSet(self.individuals, self.classes, self.properties,
+                                self.rules, self.complete))
+        journal.complete = self.complete
+        return journal
+
+    def merge(self, changes: ChangeSet) -> None:
+        """Record again a change set, e.g. when the sync that flushed it failed"""
+        self.individuals.update(changes.individuals)
+        self.classes.update(changes.classes)
+        self.properties.update(changes.properties)
+        self.rules.update(changes.rules)
+        self.complete = self.complete or changes.complete
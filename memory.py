@@ -0,0 +1,162 @@
+"""Memory used by an OntologyInterface and budget enforced on ingestion"""
+import time
+import tracemalloc
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+import owlready2
+
+BudgetCallback = Callable[[Dict[str, Any]], None]
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised by map when the memory budget is exceeded and ingestion is refused"""
+
+
+class MapBatch:
+    """Python heap allocated by a map call, with the individuals it created"""
+
+    def __init__(self, entity_type: str):
+        self.entity_type = entity_type
+        self.started: float = time.time()
+        self.individuals: int = 0
+        self.heap: int = 0
+
+    def report(self) -> Dict[str, Any]:
+        """Return the batch as a dictionary"""
+        return {
+            "entity-type": self.entity_type,
+            "started": self.started,
+            "individuals": self.individuals,
+            "heap": self.heap,
+        }
+
+
+class MemoryAccountant:
+    """
+    Report the memory used by an OntologyInterface: the size of the quadstore, the entities
+    loaded by owlready2 and cached by owlutils, the JSON data stored in the comments of
+    individuals and the python heap retained by map calls. One map call out of sample is
+    traced by tracemalloc, started for the call only unless it is already tracing, and its
+    heap growth is recorded with the number of individuals it created; the last history
+    calls are kept. The heap retained by map is estimated from the sampled calls.
+    Before every map call the quadstore and the heap are compared with budget (in bytes,
+    if given): callback, if given, is invoked with the report when the budget is crossed,
+    not again until the usage has fallen below the budget, and, if refuse is true,
+    MemoryBudgetExceeded is raised so that the entity is not ingested
+    """
+
+    def __init__(self, interface: Any, budget: Optional[int] = None,
+                 callback: Optional[BudgetCallback] = None, refuse: bool = False,
+                 sample: int = 10, history: int = 100):
+        self.interface = interface
+        self.budget = budget
+        self.callback = callback
+        self.refuse = refuse
+        self.sample = max(1, sample)
+        self.batches: Deque[MapBatch] = deque(maxlen=history)
+        self.calls: int = 0
+        self.individuals: int = 0
+        self.exceeded: int = 0
+        self.over: bool = False
+        self.retained: int = 0
+        self.tracing: bool = False
+
+    def close(self) -> None:
+        """Stop tracemalloc if it has been started by the accountant for a running map call"""
+        if self.tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.tracing = False
+
+    # Measures
+
+    def quadstore_size(self) -> int:
+        """Return the size in bytes of the SQLite database of the world"""
+        graph = self.interface.ontology.world.graph
+        pages, = graph.execute("PRAGMA page_count").fetchone()
+        page_size, = graph.execute("PRAGMA page_size").fetchone()
+        return pages * page_size
+
+    def comment_size(self) -> int:
+        """Return the size in bytes of the comments of the individuals, e.g. YANGOntology JSON data"""
+        size, = self.interface.ontology.world.graph.execute(
+            "SELECT coalesce(sum(length(CAST(o AS BLOB))), 0) FROM datas WHERE p=? AND s IN "
+            "(SELECT s FROM objs WHERE p=? AND o=?)",
+            (owlready2.comment.storid, owlready2.rdf_type, owlready2.owl_named_individual)).fetchone()
+        return size
+
+    def heap(self) -> int:
+        """Return the python heap retained by map calls, estimated from the sampled ones"""
+        return max(0, self.retained)
+
+    def usage(self) -> int:
+        """Return the memory compared with the budget: the quadstore and the python heap"""
+        return self.quadstore_size() + self.heap()
+
+    def report(self) -> Dict[str, Any]:
+        """Return the memory used, with the recorded map calls"""
+        interface = self.interface
+        return {
+            "quadstore": self.quadstore_size(),
+            "heap": self.heap(),
+            "batch-peak": max((batch.heap for batch in self.batches), default=0),
+            "entities": len(interface.ontology.world._entities),
+            "cached-names": len(interface.names.entries),
+            "queries": len(interface.queries.stats),
+            "comments": self.comment_size(),
+            "budget": self.budget,
+            "exceeded": self.exceeded,
+            "map-calls": self.calls,
+            "individuals": self.individuals,
+            "batches": [batch.report() for batch in self.batches],
+        }
+
+    # Ingestion
+
+    def check(self) -> bool:
+        """
+        Return true if the budget is exceeded, invoking the callback when the budget is
+        crossed and raising MemoryBudgetExceeded if ingestion is refused
+        """
+        if self.budget is None:
+            return False
+        usage = self.usage()
+        if usage <= self.budget:
+            self.over = False
+            return False
+
+        if not self.over:
+            self.over = True
+            self.exceeded += 1
+            if self.callback is not None:
+                self.callback(self.report())
+        if self.refuse:
+            raise MemoryBudgetExceeded(f"Memory used {usage} exceeds the budget of {self.budget} bytes")
+        return True
+
+    @contextmanager
+    def batch(self, entity_type: str) -> Iterator[None]:
+        """Check the budget, then record the heap growth of the map call in the with statement"""
+        self.check()
+        self.calls += 1
+        if (self.calls - 1) % self.sample != 0:
+            yield
+            return
+
+        batch = MapBatch(entity_type)
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+            self.tracing = True
+        individuals, heap = self.individuals, tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            batch.individuals = self.individuals - individuals
+            batch.heap = tracemalloc.get_traced_memory()[0] - heap
+            if started:
+                self.close()
+            self.retained += batch.heap * self.sample
+            self.batches.append(batch)
@@ -0,0 +1,155 @@
+"""Metrics of an OntologyInterface exposed in the OpenMetrics text format"""
+import os
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence, Tuple, Any
+
+import owlready2
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+SYNC_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+
+
+class Histogram:
+    """Cumulative histogram of observed values"""
+
+    def __init__(self, buckets: Sequence[float] = SYNC_BUCKETS):
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self.counts: List[int] = [0] * len(self.buckets)
+        self.count: int = 0
+        self.sum: float = 0
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram"""
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Metrics:
+    """
+    Counters updated by an OntologyInterface and its plugins, and gauges computed from the
+    quadstore when the metrics are collected, so that recording a metric only increments
+    a number: map calls and mapped individuals, sync durations, triples inferred by syncs,
+    actions applied by actuators, individuals per class, triples per ontology and rules
+    """
+
+    def __init__(self, interface: Any, buckets: Sequence[float] = SYNC_BUCKETS):
+        self.interface = interface
+        self.map_calls: int = 0
+        self.mapped: int = 0
+        self.inferred: int = 0
+        self.actions: Dict[str, int] = {}
+        self.syncs: Histogram = Histogram(buckets)
+
+    def record_action(self, action: str) -> None:
+        """Count an action applied by an actuator"""
+        self.actions[action] = self.actions.get(action, 0) + 1
+
+    def triple_count(self) -> int:
+        """Return the number of triples in the world of the ontology"""
+        return self.interface.ontology.world.graph.execute("SELECT count(*) FROM quads").fetchone()[0]
+
+    # Exposition
+
+    def render(self) -> str:
+        """Return the metrics in the OpenMetrics text format"""
+        world: owlready2.World = self.interface.ontology.world
+        lines: List[str] = []
+
+        def family(name: str, kind: str, description: str,
+                   samples: List[Tuple[str, Dict[str, str], float]]) -> None:
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {description}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_labels(labels)} {value}")
+
+        family("owlutils_map_calls", "counter", "Calls of map",
+               [("_total", {}, self.map_calls)])
+        family("owlutils_mapped_individuals", "counter", "Individuals created by map",
+               [("_total", {}, self.mapped)])
+        family("owlutils_inferred_triples", "counter", "Triples added by syncs",
+               [("_total", {}, self.inferred)])
+        family("owlutils_actions", "counter", "Actions applied by actuators",
+               [("_total", {"action": action}, count) for action, count in sorted(self.actions.items())])
+
+        syncs = self.syncs
+        samples = [("_bucket", {"le": _number(bound)}, count)
+                   for bound, count in zip(syncs.buckets, syncs.counts)]
+        samples.append(("_bucket", {"le": "+Inf"}, syncs.count))
+        samples.append(("_count", {}, syncs.count))
+        samples.append(("_sum", {}, syncs.sum))
+        family("owlutils_sync_duration_seconds", "histogram", "Duration of syncs", samples)
+
+        individuals = world.graph.execute(
+            "SELECT r.iri, count(*) FROM objs t JOIN resources r ON r.storid=t.o "
+            "WHERE t.p=? AND t.o>0 AND t.o!=? AND t.s IN (SELECT s FROM objs WHERE p=? AND o=?) "
+            "GROUP BY t.o",
+            (owlready2.rdf_type, owlready2.owl_named_individual,
+             owlready2.rdf_type, owlready2.owl_named_individual))
+        family("owlutils_individuals", "gauge", "Individuals asserted or inferred per class",
+               [("", {"class": iri}, count) for iri, count in individuals])
+
+        triples = world.graph.execute(
+            "SELECT o.iri, count(*) FROM quads q JOIN ontologies o ON o.c=q.c GROUP BY q.c")
+        family("owlutils_triples", "gauge", "Triples per ontology",
+               [("", {"ontology": iri}, count) for iri, count in triples])
+
+        rules = sum(len(plugin.saved_rules) for plugin in self.interface.plugins
+                    if hasattr(plugin, "saved_rules"))
+        family("owlutils_rules", "gauge", "Rules of the rule managers", [("", {}, rules)])
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write the metrics to a file, e.g. read by the node exporter textfile collector"""
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            file.write(self.render())
+        os.replace(path + ".tmp", path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve the metrics over HTTP from a daemon thread, stop the returned server with shutdown.
+        Metrics are collected in the thread of the request
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Reply to every GET with the metrics"""
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _number(value: float) -> str:
+    """Return a bucket bound as OpenMetrics requires, e.g. 1.0"""
+    return repr(float(value))
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    """Return the label set of a sample"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value"""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
@@ -0,0 +1,98 @@
+"""Extraction of the module of a world affected by the changes recorded since the last sync"""
+from typing import Iterable, Optional, Set
+
+import owlready2
+from owlutils.journal import ChangeSet
+from owlutils.reasoner import Module
+from owlutils.tbox import tbox_roots, reachable_rows, tbox_fingerprint
+
+CONTEXT_TYPES = (owlready2.swrl_imp, owlready2.owl_alldifferent)
+
+
+class ModuleExtractor:
+    """
+    Select the part of the world that a sync has to classify: the changed individuals,
+    the individuals reachable from them through object property values (in both
+    directions) up to depth hops, the individuals given as arguments of rule atoms, e.g.
+    restart in actsOn(restart, ?d), the TBox, the rules and the AllDifferent axioms.
+    The facts inferred about the individuals of the module are asserted back.
+    OWL reasoning is monotonic, so the facts inferred on the module also hold on the
+    whole world, while facts depending on individuals farther than depth are missed.
+    A full classification is required when the TBox or the rules changed since the
+    last sync, when the whole ontology has been recorded as changed, or when the
+    module has more than max_individuals individuals
+    """
+
+    def __init__(self, depth: int = 2, max_individuals: int = 10000):
+        self.depth = depth
+        self.max_individuals = max_individuals
+        self.version: Optional[str] = None
+        self.modules: int = 0
+        self.full: int = 0
+
+    def extract(self, world: owlready2.World, changes: ChangeSet,
+                version: Optional[str] = None) -> Optional[Module]:
+        """
+        Return the module affected by the changes, or None if a full sync is required.
+        version is the TBox fingerprint of the world, computed if None
+        """
+        if changes.complete or changes.rules or self.version is None or \
+           self.version != (tbox_fingerprint(world) if version is None else version):
+            self.full += 1
+            return None
+
+        seeds = [world._abbreviate(iri, False) for iri in changes.individuals]
+        individuals = self.neighborhood(world, (x for x in seeds if x is not None))
+        if individuals is None:
+            self.full += 1
+            return None
+
+        individuals |= rule_individuals(world)
+        roots = tbox_roots(world) | individuals
+        roots.update(s for s, in world.graph.execute(
+            f"SELECT DISTINCT s FROM objs WHERE p=? AND o IN ({','.join('?' * len(CONTEXT_TYPES))})",
+            (owlready2.rdf_type, *CONTEXT_TYPES)))
+
+        self.modules += 1
+        return Module(individuals, {row[0] for row in reachable_rows(world, roots)})
+
+    def neighborhood(self, world: owlready2.World, seeds: Iterable[int]) -> Optional[Set[int]]:
+        """
+        Return the individuals reachable from the seeds up to depth hops,
+        or None if they are more than max_individuals
+        """
+        named = (owlready2.rdf_type, owlready2.owl_named_individual)
+        individuals = {x for x in seeds if world._has_obj_triple_spo(x, *named)}
+        frontier = set(individuals)
+        for _ in range(self.depth):
+            if len(individuals) > self.max_individuals:
+                return None
+
+            reached = set()
+            for individual in frontier:
+                for other, in world.graph.execute(
+                        "SELECT o FROM objs WHERE s=? UNION SELECT s FROM objs WHERE o=?",
+                        (individual, individual)):
+                    if other not in individuals and other not in reached and \
+                       world._has_obj_triple_spo(other, *named):
+                        reached.add(other)
+            individuals |= reached
+            frontier = reached
+
+        return None if len(individuals) > self.max_individuals else individuals
+
+    def commit(self, world: owlready2.World, version: Optional[str] = None) -> None:
+        """
+        Record the TBox classified by the last sync. version is its fingerprint, computed
+        if None: after a module sync it is the one given to extract, since the TBox was
+        already classified and the reasoner only realized the module
+        """
+        self.version = tbox_fingerprint(world) if version is None else version
+
+
+def rule_individuals(world: owlready2.World) -> Set[int]:
+    """Return the named individuals given as arguments of the atoms of the rules"""
+    return {o for o, in world.graph.execute(
+                "SELECT DISTINCT o FROM objs WHERE p IN (?, ?) AND o>0",
+                (owlready2.swrl_argument1, owlready2.swrl_argument2))
+            if world._has_obj_triple_spo(o, owlready2.rdf_type, owlready2.owl_named_individual)}
@@ -0,0 +1,181 @@
+"""Reasoning pool serving many tenants that share the same schema"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import owlready2
+from owlutils.base import OntologyInterface
+from owlutils.reasoner import Reasoner, PelletReasoner, ReasoningCancelled, Module, \
+                              save_ntriples, pellet_arguments, destination, apply_pellet_output
+from owlutils.store import clone_world, copy_closure
+
+
+class TenantStats:
+    """Time spent by the syncs of a tenant waiting for a worker and reasoning"""
+
+    def __init__(self):
+        self.syncs: int = 0
+        self.queue_wait: float = 0
+        self.reasoning: float = 0
+        self.last_queue_wait: float = 0
+        self.last_reasoning: float = 0
+
+    def record(self, queue_wait: float, reasoning: float) -> None:
+        """Add the timings of a sync"""
+        self.syncs += 1
+        self.queue_wait += queue_wait
+        self.reasoning += reasoning
+        self.last_queue_wait = queue_wait
+        self.last_reasoning = reasoning
+
+    def report(self) -> Dict[str, float]:
+        """Return the timings as a dictionary"""
+        return {
+            "syncs": self.syncs,
+            "queue-wait": self.queue_wait,
+            "reasoning": self.reasoning,
+            "last-queue-wait": self.last_queue_wait,
+            "last-reasoning": self.last_reasoning,
+        }
+
+
+class TenantPool:
+    """
+    Serve many tenants sharing the same schema, e.g. one YANGOntology per managed network.
+    The schema and its imports are loaded once into a template world: every tenant gets
+    an isolated copy of the template quadstore, made without parsing the schema again.
+    The schema is serialized once as well, and every sync only serializes the triples
+    that the tenant added to the template (schema triples removed by a tenant are still
+    sent to the reasoner). Tenant syncs can run concurrently: at most workers Pellet
+    processes run at a time, the others wait for a free worker
+    """
+
+    def __init__(self, schema: owlready2.Ontology, workers: Optional[int] = None,
+                 java_memory: int = owlready2.reasoning.JAVA_MEMORY):
+        self.template: owlready2.Ontology = copy_closure(schema)
+        self.java_memory = java_memory
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = threading.Semaphore(self.workers)
+        self.lock = threading.Lock()
+        self.tenants: Dict[str, OntologyInterface] = {}
+        self.stats: Dict[str, TenantStats] = {}
+
+        self.schema_triples = set(self.template.world.graph._iter_triples())
+        with tempfile.NamedTemporaryFile("wb", suffix=".nt", delete=False) as tmp:
+            save_ntriples(self.template.world, tmp)
+        self.schema_file = tmp.name
+
+    def add_tenant(self, name: str,
+                   factory: Callable[[owlready2.Ontology, Reasoner], OntologyInterface],
+                   **kwargs: Any) -> OntologyInterface:
+        """
+        Create the interface of a tenant calling factory(ontology, reasoner, **kwargs),
+        e.g. a YANGOntology subclass, with a private copy of the schema
+        """
+        with self.lock:
+            world = clone_world(self.template.world)
+        interface = factory(world.get_ontology(self.template.base_iri),
+                            PooledReasoner(self, name), **kwargs)
+        self.tenants[name] = interface
+        self.stats[name] = TenantStats()
+        return interface
+
+    def remove_tenant(self, name: str) -> None:
+        """Forget a tenant"""
+        interface = self.tenants.pop(name)
+        self.stats.pop(name)
+        interface.reasoner.close()
+
+    def sync(self, **sync_kwargs: Any) -> Dict[str, Optional[Exception]]:
+        """Sync every tenant concurrently, return the exception raised by each sync, if any"""
+        def sync_tenant(interface: OntologyInterface) -> Optional[Exception]:
+            try:
+                interface.sync(**sync_kwargs)
+            except Exception as err:
+                return err
+            return None
+
+        with ThreadPoolExecutor(max(1, len(self.tenants))) as executor:
+            results = {name: executor.submit(sync_tenant, interface)
+                       for name, interface in self.tenants.items()}
+            return {name: future.result() for name, future in results.items()}
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Return the queue wait and reasoning time of every tenant"""
+        return {name: stats.report() for name, stats in self.stats.items()}
+
+    def close(self) -> None:
+        """Remove the serialized schema"""
+        if os.path.exists(self.schema_file):
+            os.unlink(self.schema_file)
+
+
+class PooledReasoner(Reasoner):
+    """Reasoner of a TenantPool tenant, it waits for a free worker before running Pellet"""
+
+    def __init__(self, pool: TenantPool, tenant: str):
+        super().__init__()
+        self.pool = pool
+        self.tenant = tenant
+        self.worker = PelletReasoner(pool.java_memory)
+
+    def cancel(self) -> None:
+        super().cancel()
+        self.worker.cancel()
+
+    def reason(self, ontology: Optional[owlready2.Ontology] = None, debug: int = 0,
+               module: Optional[Module] = None) -> None:
+        world = owlready2.default_world if ontology is None else ontology.world
+        pool = self.pool
+        schema_triples = pool.schema_triples
+
+        def tenant_filter(graph, s, p, o, d):
+            return (s, p, o, d) not in schema_triples and \
+                   (module is None or module.accepts(graph, s, p, o, d))
+
+        t_queued = time.perf_counter()
+        with pool.slots:
+            t_start = time.perf_counter()
+            self.phases["queue"] = self.phases.get("queue", 0) + t_start - t_queued
+            self.worker.cancelled.clear()
+            if self.cancelled.is_set():
+                raise ReasoningCancelled("Reasoning cancelled before start")
+
+            locked = world.graph.has_write_lock()
+            if locked:
+                world.graph.release_write_lock()
+
+            try:
+                with self.phase("save"), pool.lock, \
+                     tempfile.NamedTemporaryFile("wb", suffix=".nt", delete=False) as tmp:
+                    with open(pool.schema_file, "rb") as schema:
+                        shutil.copyfileobj(schema, tmp)
+                    save_ntriples(world, tmp, tenant_filter)
+
+                try:
+                    self.worker.verbose = self.verbose
+                    self.worker.phases = self.phases
+                    with self.phase("pellet"):
+                        output = self.worker.run(pellet_arguments(tmp.name), debug)
+                    self.log = self.worker.log
+                finally:
+                    os.unlink(tmp.name)
+
+            finally:
+                if locked:
+                    world.graph.acquire_write_lock()
+
+            t_end = time.perf_counter()
+
+        with self.phase("apply"), pool.lock:
+            apply_pellet_output(world, destination(world, ontology), output, debug,
+                                None if module is None else module.individuals)
+
+        stats = pool.stats.get(self.tenant)
+        if stats is not None:
+            stats.record(t_start - t_queued, t_end - t_start)
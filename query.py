@@ -0,0 +1,94 @@
+"""SPARQL queries compiled once and executed with different parameters"""
+import time
+
+from typing import Any, Dict, Iterator, List, Sequence, Union
+
+import owlready2
+from owlready2.sparql.main import PreparedQuery, PreparedSelectQuery
+
+
+class QueryStats:
+    """Number of executions, time spent and rows returned by a query"""
+
+    def __init__(self):
+        self.calls: int = 0
+        self.rows: int = 0
+        self.time: float = 0
+        self.last_time: float = 0
+
+    def record(self, elapsed: float, rows: int) -> None:
+        """Add the timing and the row count of an execution"""
+        self.calls += 1
+        self.rows += rows
+        self.time += elapsed
+        self.last_time = elapsed
+
+    def report(self) -> Dict[str, float]:
+        """Return the statistics as a dictionary"""
+        return {
+            "calls": self.calls,
+            "rows": self.rows,
+            "time": self.time,
+            "last-time": self.last_time,
+        }
+
+
+class QueryLog:
+    """
+    Execute SPARQL queries prepared by World.prepare_sparql, which keeps their translation
+    into SQL in a least recently used cache, so that a query is parsed once and only bound to
+    new parameters (?? or ??1 placeholders) on every execution. Statistics are kept for every
+    query executed
+    """
+
+    def __init__(self, world: owlready2.World):
+        self.world = world
+        self.stats: Dict[str, QueryStats] = {}
+
+    def prepare(self, text: str) -> PreparedQuery:
+        """Return the compiled query"""
+        return self.world.prepare_sparql(text)
+
+    def execute(self, text: str, params: Sequence[Any] = (),
+                stream: bool = False) -> Union[List[list], Iterator[list], int]:
+        """
+        Execute a query, returning the list of result rows, or a generator of rows if stream
+        is true. Modify queries return the number of matches
+        """
+        prepared = self.prepare(text)
+        stats = self.stats.setdefault(text, QueryStats())
+
+        if not isinstance(prepared, PreparedSelectQuery):
+            start = time.perf_counter()
+            matches = prepared.execute(params)
+            stats.record(time.perf_counter() - start, matches)
+            return matches
+
+        if stream:
+            return self.__stream(prepared, params, stats)
+
+        start = time.perf_counter()
+        rows = list(prepared.execute(params))
+        stats.record(time.perf_counter() - start, len(rows))
+        return rows
+
+    @staticmethod
+    def __stream(prepared: PreparedSelectQuery, params: Sequence[Any],
+                 stats: QueryStats) -> Iterator[list]:
+        """Yield the rows of a query, the time spent by the consumer is not counted"""
+        rows = 0
+        elapsed = 0.0
+        start = time.perf_counter()
+        try:
+            for row in prepared.execute(params):
+                rows += 1
+                elapsed += time.perf_counter() - start
+                yield row
+                start = time.perf_counter()
+            elapsed += time.perf_counter() - start
+        finally:
+            stats.record(elapsed, rows)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Return the statistics of every query"""
+        return {text: stats.report() for text, stats in self.stats.items()}
@@ -0,0 +1,486 @@
+"""Reasoner backends used by OntologyInterface to classify ontologies"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Optional, List, IO, Callable, Dict, Iterator, Tuple, Set
+
+import owlready2
+from owlready2.namespace import CURRENT_NAMESPACES
+from owlready2.reasoning import _PELLET_CLASSPATH, _PELLET_PROP_REGEXP, _PELLET_DATA_PROP_REGEXP, \
+                                _INFERRENCES_ONTOLOGY, _apply_reasoning_results, \
+                                _apply_inferred_obj_relations, _apply_inferred_data_relations, \
+                                _unescape_pellet_str, _decode, _subprocess_kargs
+
+PYTHON_NAME = "http://www.lesfleursdunormal.fr/static/_downloads/owlready_ontology.owl#python_name"
+PELLET_SERVER = os.path.join(os.path.dirname(__file__), "PelletServer.java")
+
+TripleFilter = Callable[[Any, int, int, Any, Any], bool]
+
+_PELLET_TASK_REGEXP = re.compile(r"^Finished (.+?) in (?:(\d+):)?(\d+):(\d+(?:\.\d+)?)\s*$", re.M)
+_PELLET_TIMER_REGEXP = re.compile(r"^\W*([A-Za-z][\w \-]*?)\s*\|\s*(\d+)\s*\|\s*\d+", re.M)
+
+
+class ReasoningCancelled(Exception):
+    """Raised by a reasoner when its classification has been cancelled"""
+
+
+class Module:
+    """
+    Subset of a world sent to the reasoner: the triples whose subject is in subjects.
+    Only the facts inferred about the individuals of the module are asserted back
+    """
+
+    def __init__(self, individuals: Set[int], subjects: Set[int]):
+        self.individuals = individuals
+        self.subjects = subjects
+
+    def accepts(self, graph: Any, s: int, p: int, o: Any, d: Any) -> bool:
+        """Triple filter selecting the triples of the module"""
+        return s in self.subjects
+
+    def __len__(self) -> int:
+        return len(self.individuals)
+
+
+class Reasoner(ABC):
+    """
+    Abstract reasoner backend. The wall time of the phases of the last classification,
+    e.g. save, pellet and apply, is kept in phases; if verbose is true the reasoner also
+    reports its internal phases there, and its diagnostic output in log
+    """
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.verbose: bool = False
+        self.phases: Dict[str, float] = {}
+        self.log: str = ""
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the wall time of the body of the with statement to a phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    @abstractmethod
+    def reason(self, ontology: Optional[owlready2.Ontology] = None, debug: int = 0,
+               module: Optional[Module] = None) -> None:
+        """
+        Classify the ontology and assert the inferred facts into it.
+        If ontology is None the whole default world is classified.
+        If module is given only its triples are classified, see Module
+        """
+
+    def cancel(self) -> None:
+        """
+        Abort the running classification, which raises ReasoningCancelled.
+        The flag is cleared by OntologyInterface before the next classification
+        """
+        self.cancelled.set()
+
+    def close(self) -> None:
+        """Release the resources held by the reasoner"""
+
+
+class PelletReasoner(Reasoner):
+    """
+    Run Pellet in a new java process for every classification, as owlready2.sync_reasoner_pellet
+    does, but keeping a handle on the process so that the classification can be cancelled.
+    With debug > 1 the output of Pellet is printed, and the explanation of Pellet is added
+    to the error raised when the ontology is inconsistent
+    """
+
+    def __init__(self, java_memory: int = owlready2.reasoning.JAVA_MEMORY):
+        super().__init__()
+        self.java_memory = java_memory
+        self.process: Optional[subprocess.Popen] = None
+
+    def cancel(self) -> None:
+        super().cancel()
+        process = self.process
+        if process is not None:
+            process.kill()
+
+    def reason(self, ontology: Optional[owlready2.Ontology] = None, debug: int = 0,
+               module: Optional[Module] = None) -> None:
+        world = owlready2.default_world if ontology is None else ontology.world
+
+        locked = world.graph.has_write_lock()
+        if locked:
+            world.graph.release_write_lock()
+
+        try:
+            with self.phase("save"), \
+                 tempfile.NamedTemporaryFile("wb", suffix=".nt", delete=False) as tmp:
+                save_ntriples(world, tmp, None if module is None else module.accepts)
+
+            try:
+                with self.phase("pellet"):
+                    output = self.run(pellet_arguments(tmp.name), debug)
+            except owlready2.OwlReadyInconsistentOntologyError as err:
+                if debug > 1:
+                    raise owlready2.OwlReadyInconsistentOntologyError(
+                        f"{err}{self.explain(tmp.name)}") from err
+                raise
+            finally:
+                os.unlink(tmp.name)
+
+        finally:
+            if locked:
+                world.graph.acquire_write_lock()
+
+        with self.phase("apply"):
+            apply_pellet_output(world, destination(world, ontology), output, debug,
+                                None if module is None else module.individuals)
+
+    def run(self, arguments: List[str], debug: int = 0) -> str:
+        """
+        Run a Pellet command in a new java process and return its output.
+        If verbose is true the phases reported by Pellet are added to phases
+        """
+        if self.verbose:
+            arguments = [arguments[0], "--verbose", *arguments[1:]]
+        command = [owlready2.JAVA_EXE, f"-Xmx{self.java_memory}M",
+                   "-cp", _PELLET_CLASSPATH, "pellet.Pellet", *arguments]
+
+        if debug:
+            print("* owlutils * Running Pellet...", file=sys.stderr)
+            print(f"    {' '.join(command)}", file=sys.stderr)
+
+        t_start = time.time()
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                        **_subprocess_kargs)
+
+        try:
+            if self.cancelled.is_set():
+                self.process.kill()
+            stdout, stderr = self.process.communicate()
+            returncode = self.process.returncode
+        finally:
+            self.process = None
+
+        if self.cancelled.is_set():
+            raise ReasoningCancelled("Pellet process killed")
+
+        self.log = _decode(stderr).replace("\r", "")
+        if self.verbose:
+            self.phases.update(pellet_phases(self.log))
+
+        if returncode == 1 and b"ERROR: Ontology is inconsistent" in stderr:
+            raise owlready2.OwlReadyInconsistentOntologyError(
+                f"Java error message is: {_decode(stderr)}")
+
+        if returncode != 0:
+            raise owlready2.OwlReadyJavaError(f"Java error message is:\n{_decode(stderr or stdout)}")
+
+        output = _decode(stdout).replace("\r", "")
+
+        if debug:
+            print(f"* owlutils * Pellet took {time.time() - t_start} seconds", file=sys.stderr)
+            if debug > 1:
+                print("* owlutils * Pellet output:", file=sys.stderr)
+                print(output, file=sys.stderr)
+
+        return output
+
+    def explain(self, filename: str) -> str:
+        """Return the explanation of Pellet for the inconsistency of a N-Triples file"""
+        command = [owlready2.JAVA_EXE, f"-Xmx{self.java_memory}M", "-cp", _PELLET_CLASSPATH,
+                   "pellet.Pellet", "explain", "--ignore-imports", filename]
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 check=False, **_subprocess_kargs)
+        return (f"\nThis is the output of `pellet explain`: \n {_decode(process.stdout)}\n"
+                f"{_decode(process.stderr)}")
+
+
+class PersistentPelletReasoner(Reasoner):
+    """
+    Keep a single Pellet java process alive and send it a classification request
+    for every sync, so that the JVM start-up and class loading are paid only once.
+    If the process dies, e.g. because the ontology is inconsistent, the request is
+    served by the fallback reasoner and a new process is started on the next sync
+    """
+
+    def __init__(self, java_memory: int = owlready2.reasoning.JAVA_MEMORY,
+                 fallback: Optional[Reasoner] = None):
+        super().__init__()
+        self.java_memory = java_memory
+        self.fallback: Reasoner = PelletReasoner() if fallback is None else fallback
+        self.process: Optional[subprocess.Popen] = None
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the Pellet process if it is not running"""
+        if self.process is not None and self.process.poll() is None:
+            return
+
+        command = [owlready2.JAVA_EXE, f"-Xmx{self.java_memory}M",
+                   "-cp", _PELLET_CLASSPATH, PELLET_SERVER]
+
+        self.process = subprocess.Popen(command,
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL,
+                                        **_subprocess_kargs)
+
+    def cancel(self) -> None:
+        super().cancel()
+        self.fallback.cancel()
+        process = self.process
+        if process is not None:
+            process.kill()
+
+    def close(self) -> None:
+        """Terminate the Pellet process"""
+        with self.lock:
+            if self.process is not None:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+    def reason(self, ontology: Optional[owlready2.Ontology] = None, debug: int = 0,
+               module: Optional[Module] = None) -> None:
+        world = owlready2.default_world if ontology is None else ontology.world
+
+        if self.cancelled.is_set():
+            raise ReasoningCancelled("Reasoning cancelled before start")
+
+        with self.lock:
+            locked = world.graph.has_write_lock()
+            if locked:
+                world.graph.release_write_lock()
+
+            try:
+                with self.phase("save"), \
+                     tempfile.NamedTemporaryFile("wb", suffix=".nt", delete=False) as tmp:
+                    save_ntriples(world, tmp, None if module is None else module.accepts)
+
+                try:
+                    t_start = time.time()
+                    with self.phase("pellet"):
+                        output = self.request(pellet_arguments(tmp.name))
+                    if debug:
+                        print(f"* owlutils * Persistent Pellet took {time.time() - t_start} seconds",
+                              file=sys.stderr)
+                finally:
+                    os.unlink(tmp.name)
+
+            finally:
+                if locked:
+                    world.graph.acquire_write_lock()
+
+        if output is None and self.cancelled.is_set():
+            raise ReasoningCancelled("Pellet process killed")
+
+        if output is None:
+            self.fallback.cancelled.clear()
+            self.fallback.verbose = self.verbose
+            self.fallback.phases = self.phases
+            self.fallback.reason(ontology, debug, module)
+            self.log = self.fallback.log
+        else:
+            with self.phase("apply"):
+                apply_pellet_output(world, destination(world, ontology), output, debug,
+                                    None if module is None else module.individuals)
+
+    def request(self, arguments: List[str]) -> Optional[str]:
+        """Send a command to the Pellet process and return its output, None on failure"""
+        try:
+            self.start()
+            self.process.stdin.write(("\t".join(arguments) + "\n").encode("utf-8"))
+            self.process.stdin.flush()
+
+            header = self.process.stdout.readline().decode("utf-8").split()
+            if len(header) != 2:
+                raise EOFError("Pellet process terminated")
+
+            status, length = header[0], int(header[1])
+            output = self.process.stdout.read(length)
+
+        except (OSError, EOFError, ValueError):
+            if self.process is not None:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+            return None
+
+        if status != "OK":
+            return None
+
+        return _decode(output).replace("\r", "")
+
+
+def pellet_arguments(filename: str,
+                     infer_property_values: bool = True,
+                     infer_data_property_values: bool = True,
+                     command: str = "realize") -> List[str]:
+    """Return the Pellet command line used to realize (or classify) a N-Triples file"""
+    arguments = [command, "--loader", "Jena", "--input-format", "N-Triples", "--ignore-imports"]
+    if infer_property_values:
+        arguments.append("--infer-prop-values")
+    if infer_data_property_values:
+        arguments.append("--infer-data-prop-values")
+    arguments.append(filename)
+    return arguments
+
+
+def pellet_phases(log: str) -> Dict[str, float]:
+    """
+    Return the wall time in seconds of the tasks reported by Pellet --verbose, e.g.
+    "pellet consistency check", from the "Finished" lines or else from the timer summary
+    """
+    phases = {}
+    for task, hours, minutes, seconds in _PELLET_TASK_REGEXP.findall(log):
+        phases[f"pellet {task}"] = int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
+
+    summary = log.find("Timer summary:")
+    if summary != -1:
+        for name, total in _PELLET_TIMER_REGEXP.findall(log[summary:]):
+            if name.lower() not in ("name", "total"):
+                phases.setdefault(f"pellet {name}", int(total) / 1000)
+    return phases
+
+
+def save_ntriples(world: owlready2.World, file: IO[bytes],
+                  triple_filter: Optional[TripleFilter] = None) -> None:
+    """Serialize the world to N-Triples skipping owlready2 annotations"""
+    python_name = world._abbreviate(PYTHON_NAME)
+
+    def save_filter(graph, s, p, o, d):
+        return p != python_name and (triple_filter is None or triple_filter(graph, s, p, o, d))
+
+    world.save(file, format="ntriples", filter=save_filter)
+
+
+def destination(world: owlready2.World,
+                ontology: Optional[owlready2.Ontology]) -> owlready2.Ontology:
+    """Return the ontology where the inferred facts are asserted, as owlready2 does"""
+    if ontology is not None:
+        return ontology
+    if CURRENT_NAMESPACES.get():
+        return CURRENT_NAMESPACES.get()[-1].ontology
+    return world.get_ontology(_INFERRENCES_ONTOLOGY)
+
+
+def apply_pellet_output(world: owlready2.World,
+                        ontology: owlready2.Ontology,
+                        output: str,
+                        debug: int = 0,
+                        individuals: Optional[Set[int]] = None) -> None:
+    """
+    Parse the output of Pellet realize and assert the inferred facts into the ontology.
+    If individuals is given, e.g. when a module has been classified, only the facts about
+    those individuals (and the classes) are asserted, and their asserted types are kept
+    """
+    new_parents, new_equivs, entity_2_type = parse_class_tree(ontology, output)
+
+    if individuals is not None:
+        new_parents = {entity: parents if entity_2_type[entity] == "class" else
+                               parents + [x for x in world._get_obj_triples_sp_o(
+                                   entity, owlready2.rdf_type) if x > 300]
+                       for entity, parents in new_parents.items()
+                       if entity_2_type[entity] == "class" or entity in individuals}
+
+    inferred_obj_relations = []
+    for a_iri, prop_iri, b_iri in _PELLET_PROP_REGEXP.findall(output):
+        prop = world[prop_iri]
+        if prop is None:
+            continue
+        a_storid = ontology._abbreviate(a_iri, False)
+        b_storid = ontology._abbreviate(b_iri.strip(), False)
+        if individuals is not None and a_storid not in individuals:
+            continue
+        if a_storid is not None and b_storid is not None and \
+           not world._has_obj_triple_spo(a_storid, prop.storid, b_storid) and \
+           (not prop._inverse_property or
+            not world._has_obj_triple_spo(b_storid, prop._inverse_storid, a_storid)):
+            inferred_obj_relations.append((a_storid, prop, b_storid))
+
+    inferred_data_relations = []
+    for a_iri, prop_iri, value, lang, datatype in _PELLET_DATA_PROP_REGEXP.findall(output):
+        prop = world[prop_iri]
+        if prop is None:
+            continue
+        a_storid = ontology._abbreviate(a_iri, False)
+        if individuals is not None and a_storid not in individuals:
+            continue
+        if lang and lang != "()":
+            datatype = f"@{lang}"
+        else:
+            datatype = ontology._abbreviate(datatype)
+            python_datatype = owlready2.base._universal_abbrev_2_datatype.get(datatype)
+            if python_datatype is int:
+                value = int(value)
+            elif python_datatype is float:
+                value = float(value)
+            elif python_datatype is str:
+                value = _unescape_pellet_str(value)
+        if a_storid is not None and not world._has_data_triple_spod(a_storid, prop.storid, value):
+            inferred_data_relations.append((a_storid, prop, value, datatype))
+
+    _apply_reasoning_results(world, ontology, debug, new_parents, new_equivs, entity_2_type)
+    _apply_inferred_obj_relations(world, ontology, debug, inferred_obj_relations)
+    _apply_inferred_data_relations(world, ontology, debug, inferred_data_relations)
+
+    if debug:
+        print("* owlutils * (NB: only changes on entities loaded in Python are shown, "
+              "other changes are done but not listed)", file=sys.stderr)
+
+
+def parse_class_tree(namespace: Any, output: str) -> Tuple[Dict[int, List[int]],
+                                                          Dict[int, List[int]],
+                                                          Dict[int, str]]:
+    """
+    Parse the class tree printed by Pellet realize or classify, return the parents and the
+    equivalent classes of every class and individual, and the type of each entity
+    """
+    new_parents = defaultdict(list)
+    new_equivs = defaultdict(list)
+    entity_2_type = {}
+    stack = []
+
+    for line in output.split("\n"):
+        if not line:
+            continue
+
+        stripped = line.lstrip()
+        depth = len(line) - len(stripped)
+        splitted = stripped.split(" - ", 1)
+        class_storids = [namespace._abbreviate(iri) for iri in splitted[0].split(" = ")]
+
+        if len(class_storids) > 1:
+            for class_storid1 in class_storids:
+                for class_storid2 in class_storids:
+                    if class_storid1 is not class_storid2:
+                        new_equivs[class_storid1].append(class_storid2)
+
+        while stack and stack[-1][0] >= depth:
+            del stack[-1]
+
+        for class_storid in class_storids:
+            entity_2_type[class_storid] = "class"
+            if len(stack) > 1:
+                new_parents[class_storid].extend(stack[-1][1])
+
+        stack.append((depth, class_storids))
+
+        if len(splitted) == 2:
+            for individual_iri in splitted[1][1:-1].split(", "):
+                if individual_iri.endswith("Anonymous Individual") or \
+                   individual_iri.endswith("Anonymous Individuals"):
+                    continue
+                individual_storid = namespace._abbreviate(individual_iri)
+                entity_2_type[individual_storid] = "individual"
+                new_parents[individual_storid].extend(class_storids)
+
+    return new_parents, new_equivs, entity_2_type
@@ -1,7 +1,7 @@
 """Create classes equivalent to class expression in order to be parsed into owlready2"""
 import types
 from urllib.parse import urlparse
-from typing import List
+from typing import Dict, List
 
 import owlready2
 from owlutils.lexer import rule_lexer as lexer
@@ -13,6 +13,7 @@ class ExpressionBuilder:
         self.ontology: owlready2.Ontology = ontology
         self.__all_ontologies: List[owlready2.Ontology] = [self.ontology]
         self.__all_ontologies.extend(x for x in self.ontology.imported_ontologies)
+        self.classes: Dict[str, str] = {}
 
     @staticmethod
     def is_iri(expression: str) -> bool:
@@ -91,6 +92,11 @@ class ExpressionBuilder:
 
         restriction_type = expression_restriction.type.lower()
 
+        existing = getattr(self.ontology, class_name(class_expression))
+        if isinstance(existing, owlready2.ThingClass):
+            self.classes[expression] = existing.iri
+            return existing
+
         with self.ontology:
             new_class = types.new_class(class_name(class_expression), (owlready2.Thing,))
             if isinstance(domain_class, owlready2.ObjectPropertyClass):
@@ -126,6 +132,7 @@ class ExpressionBuilder:
                 if restriction_type == 'max':
                     new_class.is_a.append(domain_class.max(int(expression_restriction.value)))
 
+            self.classes[expression] = new_class.iri
             return new_class
 
     def is_expression(self, expression: str) -> bool:
@@ -0,0 +1,110 @@
+"""Coalesce bursts of sync requests into bounded reasoning runs"""
+import asyncio
+
+from typing import Any, List, Optional
+
+from owlutils.base import OntologyInterface
+
+
+class SyncScheduler:
+    """
+    Accept sync requests and serve them with as few reasoning passes as possible.
+    A pass starts when no request has been received for min_interval seconds,
+    or when the oldest pending request has been waiting for max_latency seconds.
+    At most one pass runs at a time: requests received while a pass is running
+    are merged into the next one, since their changes may not be covered by it
+    """
+
+    def __init__(self, ontology: OntologyInterface,
+                 min_interval: float = 0.5,
+                 max_latency: float = 5.0,
+                 **sync_kwargs: Any):
+        self.ontology = ontology
+        self.min_interval = min_interval
+        self.max_latency = max_latency
+        self.sync_kwargs = sync_kwargs
+        self.pending: List[asyncio.Future] = []
+        self.first_request: float = 0
+        self.last_request: float = 0
+        self.passes: int = 0
+        self.__wakeup: Optional[asyncio.Event] = None
+        self.__task: Optional[asyncio.Task] = None
+
+    def request(self) -> asyncio.Future:
+        """Request a sync, the returned future resolves when a sync covering it completes"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        now = loop.time()
+        if not self.pending:
+            self.first_request = now
+        self.last_request = now
+        self.pending.append(future)
+
+        if self.__wakeup is None:
+            self.__wakeup = asyncio.Event()
+        self.__wakeup.set()
+
+        if self.__task is None or self.__task.done():
+            self.__task = loop.create_task(self.__run())
+
+        return future
+
+    async def sync(self) -> None:
+        """Request a sync and wait for it"""
+        await self.request()
+
+    async def flush(self) -> None:
+        """Serve the pending requests without waiting for the debounce interval"""
+        if self.pending:
+            self.first_request = asyncio.get_running_loop().time() - self.max_latency
+            future = self.request()
+            await future
+
+    async def close(self) -> None:
+        """Stop the scheduler, pending requests are cancelled"""
+        if self.__task is not None:
+            self.__task.cancel()
+            await asyncio.gather(self.__task, return_exceptions=True)
+            self.__task = None
+
+        for future in self.pending:
+            future.cancel()
+        self.pending = []
+
+    async def __run(self) -> None:
+        """Serve pending requests, one reasoning pass at a time"""
+        loop = asyncio.get_running_loop()
+
+        while self.pending:
+            while True:
+                deadline = min(self.last_request + self.min_interval,
+                               self.first_request + self.max_latency)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+
+                self.__wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.__wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch, self.pending = self.pending, []
+
+            try:
+                await self.ontology.async_sync(**self.sync_kwargs)
+            except asyncio.CancelledError:
+                for future in batch:
+                    future.cancel()
+                raise
+            except Exception as err:
+                for future in batch:
+                    if not future.done():
+                        future.set_exception(err)
+            else:
+                for future in batch:
+                    if not future.done():
+                        future.set_result(None)
+            finally:
+                self.passes += 1
@@ -0,0 +1,167 @@
+"""Reasoning over independent groups of individuals in parallel Pellet processes"""
+import os
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+
+import owlready2
+from owlutils.module import CONTEXT_TYPES, rule_individuals
+from owlutils.reasoner import Reasoner, PelletReasoner, ReasoningCancelled, Module, \
+                              save_ntriples, pellet_arguments, destination, apply_pellet_output
+from owlutils.tbox import tbox_roots, reachable_rows
+
+
+class ShardedReasoner(Reasoner):
+    """
+    Partition the individuals into the connected components of the graph of object property
+    values, pack the components into at most shards groups of similar size and realize every
+    group in its own Pellet process, in parallel. Every shard holds the whole TBox, the rules
+    and the AllDifferent axioms, and the individuals given as arguments of rule atoms, e.g.
+    restart in actsOn(restart, ?d), are in every shard, so that the facts inferred about
+    them by any shard are kept. The inferred facts are asserted back one shard at a time.
+    The world is classified in a single run when a rule may join individuals of different
+    components, i.e. when its individual variables are not connected by property atoms
+    """
+
+    def __init__(self, shards: Optional[int] = None,
+                 java_memory: int = owlready2.reasoning.JAVA_MEMORY):
+        super().__init__()
+        self.shards = shards or os.cpu_count() or 1
+        self.workers = [PelletReasoner(java_memory) for _ in range(self.shards)]
+        self.sizes: List[int] = []
+
+    def cancel(self) -> None:
+        super().cancel()
+        for worker in self.workers:
+            worker.cancel()
+
+    def reason(self, ontology: Optional[owlready2.Ontology] = None, debug: int = 0,
+               module: Optional[Module] = None) -> None:
+        world = owlready2.default_world if ontology is None else ontology.world
+        for worker in self.workers:
+            worker.cancelled.clear()
+
+        with self.phase("partition"):
+            groups = self.partition(world, None if module is None else module.individuals)
+        self.sizes = [len(group) for group in groups]
+        if len(groups) < 2:
+            self.workers[0].verbose = self.verbose
+            self.workers[0].phases = self.phases
+            self.workers[0].reason(ontology, debug, module)
+            self.log = self.workers[0].log
+            return
+
+        context = tbox_roots(world)
+        context.update(s for s, in world.graph.execute(
+            f"SELECT DISTINCT s FROM objs WHERE p=? AND o IN ({','.join('?' * len(CONTEXT_TYPES))})",
+            (owlready2.rdf_type, *CONTEXT_TYPES)))
+
+        locked = world.graph.has_write_lock()
+        if locked:
+            world.graph.release_write_lock()
+
+        files = []
+        try:
+            for group in groups:
+                shard = Module(group, {row[0] for row in reachable_rows(world, context | group)})
+                with self.phase("save"), \
+                     tempfile.NamedTemporaryFile("wb", suffix=".nt", delete=False) as tmp:
+                    files.append(tmp.name)
+                    save_ntriples(world, tmp, shard.accepts)
+
+            with self.phase("pellet"), ThreadPoolExecutor(len(files)) as executor:
+                futures = [executor.submit(worker.run, pellet_arguments(filename), debug)
+                           for worker, filename in zip(self.workers, files)]
+                outputs = [future.result() for future in futures]
+
+        finally:
+            for filename in files:
+                os.unlink(filename)
+            if locked:
+                world.graph.acquire_write_lock()
+
+        if self.cancelled.is_set():
+            raise ReasoningCancelled("Pellet processes killed")
+
+        with self.phase("apply"):
+            for group, output in zip(groups, outputs):
+                apply_pellet_output(world, destination(world, ontology), output, debug, group)
+
+    def partition(self, world: owlready2.World,
+                  individuals: Optional[Set[int]] = None) -> List[Set[int]]:
+        """
+        Return the groups of individuals to realize separately, a single group
+        if the rules prevent sharding. If individuals is given only they are partitioned.
+        The individuals the rules refer to do not join components, they are added to every group
+        """
+        if any(not self.local(rule) for rule in world.rules()):
+            return [set(individuals) if individuals is not None else set()]
+
+        constants = rule_individuals(world)
+        named = {s for s, in world.graph.execute(
+            "SELECT s FROM objs WHERE p=? AND o=?",
+            (owlready2.rdf_type, owlready2.owl_named_individual))}
+        if individuals is not None:
+            named &= individuals
+        named -= constants
+
+        parents: Dict[int, int] = {x: x for x in named}
+
+        def find(x: int) -> int:
+            while parents[x] != x:
+                parents[x] = parents[parents[x]]
+                x = parents[x]
+            return x
+
+        def union(x: int, y: int) -> None:
+            if x in parents and y in parents:
+                parents[find(x)] = find(y)
+
+        for s, o in world.graph.execute("SELECT s, o FROM objs WHERE s>0 AND o>0"):
+            union(s, o)
+        for s, o in world.graph.execute(
+                "SELECT objs.s, restriction.o FROM objs, objs restriction "
+                "WHERE objs.p=? AND objs.o<0 AND restriction.s=objs.o AND restriction.o>0",
+                (owlready2.rdf_type,)):
+            union(s, o)
+
+        components: Dict[int, Set[int]] = {}
+        for x in named:
+            components.setdefault(find(x), set()).add(x)
+
+        groups: List[Set[int]] = [set() for _ in range(min(self.shards, len(components)))]
+        for component in sorted(components.values(), key=len, reverse=True):
+            min(groups, key=len).update(component)
+        for group in groups:
+            group.update(constants)
+        return groups
+
+    @staticmethod
+    def local(rule: owlready2.Imp) -> bool:
+        """Return true if the individual variables of the rule are connected by property atoms"""
+        variables = set()
+        for atom in rule.body:
+            if isinstance(atom, (owlready2.BuiltinAtom, owlready2.DataRangeAtom)):
+                continue
+            arguments = atom.arguments
+            if isinstance(atom, owlready2.DatavaluedPropertyAtom):
+                arguments = arguments[:1]
+            variables.update(x.name for x in arguments if isinstance(x, owlready2.Variable))
+
+        edges = [(atom.arguments[0].name, atom.arguments[1].name) for atom in rule.body
+                 if isinstance(atom, owlready2.IndividualPropertyAtom) and
+                 all(isinstance(argument, owlready2.Variable) for argument in atom.arguments)]
+
+        if not variables:
+            return True
+
+        reached = {next(iter(variables))}
+        changed = True
+        while changed:
+            changed = False
+            for x, y in edges:
+                if (x in reached) != (y in reached):
+                    reached.update((x, y))
+                    changed = True
+        return variables <= reached
@@ -0,0 +1,240 @@
+"""Helpers operating on the owlready2 quadstore"""
+import io
+import itertools
+import sqlite3
+
+from typing import Iterable, List, Optional
+from weakref import WeakKeyDictionary
+
+import owlready2
+from owlready2.base import LOADING
+
+
+def clone_world(world: owlready2.World) -> owlready2.World:
+    """Copy the quadstore of a world into a new in-memory world"""
+    world.graph.commit()
+
+    clone = owlready2.World(exclusive=False)
+    clone.graph.db.commit()
+    world.graph.db.backup(clone.graph.db)
+
+    clone.graph.prop_fts = {storid for (storid,) in clone.graph.execute("SELECT storid FROM prop_fts")}
+    for iri in clone.graph.ontologies_iris():
+        clone.get_ontology(iri)
+
+    return clone
+
+
+def open_world(filename: str) -> owlready2.World:
+    """
+    Open the on-disk quadstore in filename, creating it if missing, with write-ahead logging.
+    The ontologies already stored are returned by World.get_ontology without parsing them again
+    """
+    world = owlready2.World(filename=filename, exclusive=False)
+    world.graph.commit()
+    world.graph.execute("PRAGMA journal_mode=WAL")
+    world.graph.execute("PRAGMA synchronous=NORMAL")
+    return world
+
+
+def copy_closure(ontology: owlready2.Ontology,
+                 world: Optional[owlready2.World] = None) -> owlready2.Ontology:
+    """
+    Copy an ontology and the ontologies it imports, recursively, into a world,
+    a new private world if None. Ontologies already loaded in the world are not copied
+    """
+    world = owlready2.World() if world is None else world
+    copied = set()
+
+    def copy(source: owlready2.Ontology) -> owlready2.Ontology:
+        target = world.get_ontology(source.base_iri)
+        if target.loaded or source.base_iri in copied:
+            return target
+        copied.add(source.base_iri)
+
+        for imported in source.imported_ontologies:
+            copy(imported)
+
+        buffer = io.BytesIO()
+        source.save(buffer, format="ntriples")
+        buffer.seek(0)
+        return target.load(fileobj=buffer)
+
+    return copy(ontology)
+
+
+class CheckpointError(Exception):
+    """Raised when a savepoint cannot be rolled back, e.g. because the quadstore was committed"""
+
+
+TOUCHED = "owlutils_touched"
+
+_TRACKED = {"objs": ("s", "o"), "datas": ("s",), "resources": ("storid",)}
+
+
+class Savepoint:
+    """
+    SQLite savepoint on the quadstore of a world. Rolling back restores the triples in
+    constant time, the python entities loaded by owlready2 are then reloaded. While
+    savepoints are open, temporary triggers record in the TOUCHED table the storids whose
+    triples are written, so that only those entities are reloaded.
+    Committing the quadstore, e.g. with World.save, releases the savepoint
+    """
+
+    counter = itertools.count()
+    depths: "WeakKeyDictionary[owlready2.World, int]" = WeakKeyDictionary()
+
+    def __init__(self, world: owlready2.World):
+        self.world = world
+        self.name = f"owlutils_{next(Savepoint.counter)}"
+        depth = Savepoint.depths.get(world, 0)
+        if depth == 0:
+            track_writes(world)
+        Savepoint.depths[world] = depth + 1
+        world.graph.execute(f"SAVEPOINT {self.name}")
+
+    def rollback(self) -> List[int]:
+        """
+        Discard the changes made to the quadstore since the savepoint,
+        return the storids whose triples were restored
+        """
+        graph = self.world.graph
+        touched = written(self.world)
+        try:
+            graph.execute(f"ROLLBACK TO {self.name}")
+            graph.execute(f"RELEASE {self.name}")
+        except sqlite3.OperationalError as err:
+            raise CheckpointError(f"Cannot roll back to {self.name}: {err}") from err
+        finally:
+            self.__close()
+        reload_entities(self.world, touched)
+        return touched
+
+    def release(self) -> None:
+        """Keep the changes made to the quadstore since the savepoint"""
+        try:
+            self.world.graph.execute(f"RELEASE {self.name}")
+        except sqlite3.OperationalError as err:
+            raise CheckpointError(f"Cannot release {self.name}: {err}") from err
+        finally:
+            self.__close()
+
+    def __close(self) -> None:
+        """Stop recording the written storids when the last savepoint is closed"""
+        depth = Savepoint.depths.pop(self.world, 1) - 1
+        if depth > 0:
+            Savepoint.depths[self.world] = depth
+        else:
+            untrack_writes(self.world)
+
+
+def track_writes(world: owlready2.World, name: str = TOUCHED) -> None:
+    """Create the table name and the triggers adding the storids written to it"""
+    graph = world.graph
+    graph.execute(f"CREATE TEMP TABLE IF NOT EXISTS {name} (storid INTEGER PRIMARY KEY)")
+    for table, columns in _TRACKED.items():
+        for event, rows in (("INSERT", ("NEW",)), ("DELETE", ("OLD",)), ("UPDATE", ("OLD", "NEW"))):
+            values = ", ".join(f"({row}.{column})" for row in rows for column in columns)
+            graph.execute(f"CREATE TEMP TRIGGER IF NOT EXISTS {name}_{table}_{event.lower()} "
+                          f"AFTER {event} ON {table} "
+                          f"BEGIN INSERT OR IGNORE INTO {name} VALUES {values}; END")
+
+
+def untrack_writes(world: owlready2.World, name: str = TOUCHED) -> None:
+    """Drop the table name and its triggers"""
+    graph = world.graph
+    for table in _TRACKED:
+        for event in ("insert", "delete", "update"):
+            graph.execute(f"DROP TRIGGER IF EXISTS {name}_{table}_{event}")
+    graph.execute(f"DROP TABLE IF EXISTS {name}")
+
+
+def written(world: owlready2.World, name: str = TOUCHED) -> List[int]:
+    """Return the storids recorded in the table name"""
+    return [storid for storid, in world.graph.execute(f"SELECT storid FROM {name}")]
+
+
+REVISIONS = "owlutils_revisions"
+
+
+def track_revisions(world: owlready2.World) -> None:
+    """Create the REVISIONS table and the triggers counting the triples written in every graph"""
+    graph = world.graph
+    graph.execute(f"CREATE TEMP TABLE IF NOT EXISTS {REVISIONS} (c INTEGER PRIMARY KEY, n INTEGER)")
+    for table in ("objs", "datas"):
+        for event, rows in (("INSERT", ("NEW",)), ("DELETE", ("OLD",)), ("UPDATE", ("OLD", "NEW"))):
+            statements = " ".join(f"INSERT INTO {REVISIONS} VALUES ({row}.c, 1) "
+                                  f"ON CONFLICT(c) DO UPDATE SET n=n+1;" for row in rows)
+            graph.execute(f"CREATE TEMP TRIGGER IF NOT EXISTS {REVISIONS}_{table}_{event.lower()} "
+                          f"AFTER {event} ON {table} BEGIN {statements} END")
+
+
+def graph_revision(world: owlready2.World, graphs: Iterable[int]) -> int:
+    """Return the number of triples written in the graphs since track_revisions"""
+    graphs = list(graphs)
+    revision, = world.graph.execute(
+        f"SELECT coalesce(sum(n), 0) FROM {REVISIONS} WHERE c IN ({','.join('?' * len(graphs))})",
+        graphs).fetchone()
+    return revision
+
+
+def reload_entities(world: owlready2.World, storids: Optional[Iterable[int]] = None) -> None:
+    """
+    Update the python entities loaded by owlready2 after the quadstore has been modified
+    behind its back: entities no longer in the quadstore are forgotten, the parents of
+    classes and individuals are read again and the cached property values are dropped.
+    Only the loaded entities among storids are updated, every loaded entity if None.
+    Blank nodes, e.g. rules and restrictions, are forgotten since their ids may be reused.
+    Fusion classes, registered by owlready2 under their iri, are kept
+    """
+    props = world._props
+    if storids is None:
+        storids = list(world._entities.keys())
+        for ontology in world.ontologies.values():
+            ontology._bnodes.clear()
+    else:
+        bnodes: List[int] = [x for x in storids if x < 0]
+        for ontology in world.ontologies.values():
+            for storid in bnodes:
+                ontology._bnodes.pop(storid, None)
+
+    for storid in storids:
+        entity = world._entities.get(storid)
+        if entity is None or not isinstance(storid, int):
+            continue
+        if storid < 0:
+            del world._entities[storid]
+            continue
+        if storid <= 300:
+            continue
+        if world.graph.execute("SELECT 1 FROM resources WHERE storid=?", (storid,)).fetchone() is None:
+            del world._entities[storid]
+            if isinstance(entity, owlready2.PropertyClass) and props.get(entity.python_name) is entity:
+                del props[entity.python_name]
+            continue
+
+        parents = None
+        if isinstance(entity, owlready2.ThingClass):
+            parents = [world._get_by_storid(x) for x in
+                       world._get_obj_triples_sp_o(storid, owlready2.rdfs_subclassof)] or \
+                      [owlready2.Thing]
+        elif isinstance(entity, owlready2.Thing):
+            parents = [world._get_by_storid(x) for x in
+                       world._get_obj_triples_sp_o(storid, owlready2.rdf_type)
+                       if x != owlready2.owl_named_individual] or [owlready2.Thing]
+        # owlready2 recomputes the descendants of a class whose parents are assigned
+        if parents is not None and parents != list(entity.is_a):
+            with LOADING:
+                entity.is_a = parents
+
+        for name in list(vars(entity)):
+            if name in props:
+                if isinstance(entity, type):
+                    type.__delattr__(entity, name)
+                else:
+                    del vars(entity)[name]
+
+        if isinstance(entity, type):
+            type.__setattr__(entity, "_equivalent_to", None)
+        elif "_equivalent_to" in vars(entity):
+            vars(entity)["_equivalent_to"] = None
@@ -0,0 +1,182 @@
+"""Classification of the TBox computed once per schema version and reused across syncs"""
+import json
+import os
+import tempfile
+
+from typing import Dict, List, Optional, Set, Iterable
+
+import owlready2
+from owlutils.cache import Row, digest
+from owlutils.reasoner import PelletReasoner, PYTHON_NAME, save_ntriples, pellet_arguments, \
+                              parse_class_tree
+from owlready2.reasoning import _apply_reasoning_results
+
+TBOX_ONTOLOGY = "http://owlutils/tbox.owl#"
+
+TBOX_TYPES = (owlready2.owl_class,
+              owlready2.owl_object_property,
+              owlready2.owl_data_property,
+              owlready2.owl_alldisjointclasses,
+              owlready2.owl_alldisjointproperties)
+
+
+class TBoxCache:
+    """
+    Classify the TBox alone once for every schema version, identified by a fingerprint
+    of the triples describing classes, properties and class axioms. The inferred
+    subclass and equivalence axioms are asserted in a sidecar ontology, so that
+    every sync starts from a fully classified hierarchy and the reasoner only has to
+    realize the individuals. The classification is also saved in the directory,
+    if given, to be reused by other processes. When the TBox changes the sidecar
+    ontology is destroyed and the new TBox is classified
+    """
+
+    def __init__(self, directory: Optional[str] = None, reasoner: Optional[PelletReasoner] = None):
+        self.directory = directory
+        self.reasoner: PelletReasoner = PelletReasoner() if reasoner is None else reasoner
+        self.version: Optional[str] = None
+        self.classifications: int = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def prepare(self, world: owlready2.World, debug: int = 0) -> None:
+        """Assert the classification of the current TBox, classifying it if it changed"""
+        sidecar = world.get_ontology(TBOX_ONTOLOGY)
+        version = tbox_fingerprint(world, sidecar.graph.c)
+        if version == self.version:
+            return
+
+        hierarchy = self.load(version)
+        if hierarchy is None:
+            hierarchy = self.classify(world, sidecar.graph.c, debug)
+            self.classifications += 1
+            self.store(version, hierarchy)
+
+        sidecar.destroy(update_is_a=True)
+        sidecar = world.get_ontology(TBOX_ONTOLOGY)
+        self.apply(sidecar, hierarchy, debug)
+        self.version = version
+
+    def classify(self, world: owlready2.World, exclude: Optional[int] = None,
+                 debug: int = 0) -> Dict[str, List[List[str]]]:
+        """Classify the TBox of the world with Pellet and return the inferred axioms as iris"""
+        subjects = {row[0] for row in tbox_rows(world, exclude)}
+
+        locked = world.graph.has_write_lock()
+        if locked:
+            world.graph.release_write_lock()
+
+        try:
+            with tempfile.NamedTemporaryFile("wb", suffix=".nt", delete=False) as tmp:
+                save_ntriples(world, tmp, lambda graph, s, p, o, d: s in subjects)
+
+            try:
+                arguments = pellet_arguments(tmp.name, False, False, command="classify")
+                output = self.reasoner.run(arguments, debug)
+            finally:
+                os.unlink(tmp.name)
+
+        finally:
+            if locked:
+                world.graph.acquire_write_lock()
+
+        new_parents, new_equivs, _ = parse_class_tree(world, output)
+        iri = world._unabbreviate
+        return {
+            "subclasses": [[iri(child), iri(parent)] for child, parents in new_parents.items()
+                           if child > 300 for parent in parents],
+            "equivalents": [[iri(first), iri(second)] for first, others in new_equivs.items()
+                            for second in others],
+        }
+
+    @staticmethod
+    def apply(sidecar: owlready2.Ontology, hierarchy: Dict[str, List[List[str]]],
+              debug: int = 0) -> None:
+        """Assert the inferred axioms missing from the world into the sidecar ontology"""
+        world = sidecar.world
+        new_parents = {}
+        new_equivs = {}
+        entity_2_type = {}
+
+        for child, parent in hierarchy["subclasses"]:
+            child = world._abbreviate(child)
+            new_parents.setdefault(child, []).append(world._abbreviate(parent))
+            entity_2_type[child] = "class"
+
+        for first, second in hierarchy["equivalents"]:
+            first = world._abbreviate(first)
+            new_equivs.setdefault(first, []).append(world._abbreviate(second))
+            entity_2_type[first] = "class"
+
+        _apply_reasoning_results(world, sidecar, debug, new_parents, new_equivs, entity_2_type)
+
+    # Storage
+
+    def __path(self, version: str) -> str:
+        return os.path.join(self.directory, f"tbox-{version}.json")
+
+    def load(self, version: str) -> Optional[Dict[str, List[List[str]]]]:
+        """Return the classification saved for a TBox version, or None"""
+        if self.directory is None:
+            return None
+        try:
+            with open(self.__path(version), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, version: str, hierarchy: Dict[str, List[List[str]]]) -> None:
+        """Save the classification of a TBox version"""
+        if self.directory is None:
+            return
+        path = self.__path(version)
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(hierarchy, file)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
+
+
+def tbox_roots(world: owlready2.World) -> Set[int]:
+    """Return the classes, the properties and the disjointness axioms of the world"""
+    marks = ",".join("?" * len(TBOX_TYPES))
+    return {s for s, in world.graph.execute(
+        f"SELECT DISTINCT s FROM objs WHERE p=? AND o IN ({marks})",
+        (owlready2.rdf_type, *TBOX_TYPES))}
+
+
+def reachable_rows(world: owlready2.World, roots: Iterable[int],
+                   exclude: Optional[int] = None) -> List[Row]:
+    """
+    Return the triples whose subject is one of the roots or a blank node they reference.
+    Triples of the ontology whose graph id is exclude are skipped
+    """
+    python_name = world._abbreviate(PYTHON_NAME)
+    rows: List[Row] = []
+    stack = list(roots)
+    seen = set(stack)
+    while stack:
+        subject = stack.pop()
+        for c, s, p, o, d in world.graph.execute("SELECT c, s, p, o, d FROM quads WHERE s=?",
+                                                 (subject,)):
+            if c == exclude or p == python_name:
+                continue
+            rows.append((s, p, o, d))
+            if d is None and isinstance(o, int) and o < 0 and o not in seen:
+                seen.add(o)
+                stack.append(o)
+    return rows
+
+
+def tbox_rows(world: owlready2.World, exclude: Optional[int] = None) -> List[Row]:
+    """
+    Return the triples describing the classes, the properties and the class axioms of
+    the world, with the blank nodes they reference, see reachable_rows
+    """
+    return reachable_rows(world, tbox_roots(world), exclude)
+
+
+def tbox_fingerprint(world: owlready2.World, exclude: Optional[int] = None) -> str:
+    """Return a digest of the TBox of the world, see tbox_rows"""
+    return digest(world, tbox_rows(world, exclude))
@@ -0,0 +1,80 @@
+"""Tests of the ingestion held while async_sync runs the reasoner"""
+import asyncio
+import threading
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface
+from owlutils.reasoner import Reasoner
+
+
+class BlockingReasoner(Reasoner):
+    """Reasoner asserting Known on every device once released"""
+
+    def __init__(self, ontology):
+        super().__init__()
+        self.ontology = ontology
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def reason(self, ontology=None, debug=0, module=None):
+        self.started.set()
+        self.release.wait(5)
+        with self.ontology:
+            for device in self.ontology.Device.instances():
+                device.is_a.append(self.ontology.Known)
+
+
+class Devices(OntologyInterface):
+    """Interface mapping a name to a device"""
+
+    def map(self, entity_type, entity):
+        self.ensure_idle()
+        with self.ontology:
+            device = self.ontology.Device(entity["name"])
+        self.mapped(device)
+        return device
+
+
+class TestAsyncSync(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/async#")
+        with self.ontology:
+            class Device(owlready2.Thing):
+                pass
+
+            class Known(owlready2.Thing):  # pylint: disable=unused-variable
+                pass
+
+            Device("d1")
+        self.reasoner = BlockingReasoner(self.ontology)
+        self.interface = Devices(self.ontology, self.reasoner)
+
+    def test_map_held_until_reasoner_completes(self):
+        async def scenario():
+            sync = asyncio.ensure_future(self.interface.async_sync())
+            await asyncio.get_running_loop().run_in_executor(None, self.reasoner.started.wait, 5)
+
+            with self.assertRaises(RuntimeError):
+                self.interface.map("device", {"name": "d2"})
+            mapped = asyncio.ensure_future(self.interface.async_map("device", {"name": "d2"}))
+            await asyncio.sleep(0.01)
+            self.assertIsNone(self.ontology.d2)
+
+            self.reasoner.release.set()
+            await sync
+            return await mapped
+
+        device = asyncio.run(scenario())
+
+        self.assertIs(device, self.ontology.d2)
+        self.assertNotIn(self.ontology.Known, device.is_a)
+        self.assertEqual({subject for _, subject, _, _ in self.interface.delta.entities(self.world)},
+                         {self.ontology.d1})
+        self.assertIn("http://example.org/async#d2", self.interface.journal.individuals)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Tests of the cache of reasoning results"""
+import tempfile
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface
+from owlutils.engine import NativeReasoner
+
+
+class TestReasoningCache(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/cache#")
+        with self.ontology:
+            class Port(owlready2.Thing):
+                pass
+
+            class Up(owlready2.Thing):
+                pass
+
+            class hasPort(owlready2.ObjectProperty):  # pylint: disable=invalid-name
+                range = [Port]
+
+            class Device(owlready2.Thing):
+                pass
+
+            class Active(owlready2.Thing):  # pylint: disable=unused-variable
+                equivalent_to = [Device & hasPort.some(Up)]
+
+            self.port = Port("port")
+            self.device = Device("device", hasPort=[self.port])
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.interface = OntologyInterface(self.ontology, NativeReasoner())
+        self.interface.enable_cache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_state_seen_before_is_a_hit(self):
+        cache = self.interface.cache
+        for up in (False, True, False, True):
+            if up:
+                self.port.is_a.append(self.ontology.Up)
+            else:
+                self.port.is_a = [self.ontology.Port]
+            self.interface.touch(self.port)
+            self.interface.sync()
+
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 2)
+        self.assertIn(self.ontology.Active, self.device.is_a)
+
+    def test_rollback_restores_inferred_triples(self):
+        self.interface.sync()
+        with self.interface.checkpoint():
+            with self.ontology:
+                self.port.is_a.append(self.ontology.Up)
+                device = self.ontology.Device("router", hasPort=[self.port])
+            self.interface.mapped(self.port, device)
+            self.interface.sync()
+            self.assertIn(self.ontology.Active, device.is_a)
+            storid = device.storid
+
+        with self.ontology:
+            other = self.ontology.Device("other")
+        self.assertEqual(other.storid, storid)
+        before = self.interface.cache.fingerprint(self.world)
+        other.is_a.append(self.ontology.Active)
+        self.assertNotEqual(self.interface.cache.fingerprint(self.world), before)
+
+
+class TestEntityCache(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/names#")
+        with self.ontology:
+            class Device(owlready2.Thing):
+                pass
+
+            self.device = Device("device")
+        self.interface = OntologyInterface(self.ontology, NativeReasoner())
+
+    def test_hit(self):
+        self.assertIs(self.interface.get("device"), self.device)
+        self.assertIs(self.interface.get("device"), self.device)
+        self.assertEqual(self.interface.names.hits, 1)
+
+    def test_renamed_entity_is_not_served(self):
+        self.interface.get("device")
+        self.device.name = "router"
+        self.assertIsNone(self.interface.get("device"))
+        self.assertIs(self.interface.get("router"), self.device)
+
+    def test_destroyed_entity_is_not_served(self):
+        self.interface.get("device")
+        owlready2.destroy_entity(self.device)
+        self.assertIsNone(self.interface.get("device"))
+
+    def test_attributes_are_not_cached(self):
+        self.assertEqual(self.interface.get("base_iri"), self.ontology.base_iri)
+        self.assertEqual(self.interface.get("base_iri"), self.ontology.base_iri)
+        self.assertNotIn("base_iri", self.interface.names.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Tests of the streaming export of the ontology"""
+import io
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface
+from owlutils.engine import NativeReasoner
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/export#")
+        with self.ontology:
+            class Port(owlready2.Thing):
+                pass
+
+            class Up(owlready2.Thing):
+                pass
+
+            class hasPort(owlready2.ObjectProperty):  # pylint: disable=invalid-name
+                range = [Port]
+
+            class Device(owlready2.Thing):
+                pass
+
+            class Active(owlready2.Thing):  # pylint: disable=unused-variable
+                equivalent_to = [Device & hasPort.some(Up)]
+
+            port = Up("port")
+            Device("device", hasPort=[port])
+
+        self.interface = OntologyInterface(self.ontology, NativeReasoner())
+        self.interface.sync()
+
+    def export(self, inferred):
+        """Return the N-Triples lines of the export"""
+        output = io.BytesIO()
+        self.interface.export(output, inferred=inferred)
+        return set(output.getvalue().decode("utf-8").splitlines())
+
+    def test_inferred_triples_of_default_sync_left_out(self):
+        active = ("<http://example.org/export#device> "
+                  "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type> "
+                  "<http://example.org/export#Active> .")
+        self.assertIn(self.ontology.Active, self.ontology.device.is_a)
+        self.assertIn(active, self.export(True))
+
+        asserted = self.export(False)
+        self.assertNotIn(active, asserted)
+        self.assertIn(active.replace("#Active", "#Device"), asserted)
+
+
+if __name__ == "__main__":
+    unittest.main()
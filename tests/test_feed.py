@@ -0,0 +1,78 @@
+"""Tests of the triples published after every sync"""
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface
+from owlutils.reasoner import Reasoner
+
+
+class ScriptedReasoner(Reasoner):
+    """Reasoner applying the changes of a function instead of classifying"""
+
+    def __init__(self):
+        super().__init__()
+        self.script = lambda: None
+
+    def reason(self, ontology=None, debug=0, module=None):
+        self.script()
+
+
+class TestChangeFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/feed#")
+        with self.ontology:
+            class Device(owlready2.Thing):
+                pass
+
+            class Active(owlready2.Thing):  # pylint: disable=unused-variable
+                pass
+
+            class hasName(owlready2.DataProperty):  # pylint: disable=invalid-name
+                range = [str]
+
+            self.device = Device("device", hasName=["r1"])
+
+        self.deltas = []
+        self.reasoner = ScriptedReasoner()
+        self.interface = OntologyInterface(self.ontology, self.reasoner)
+        self.interface.subscribe(self.deltas.append)
+
+    def sync(self, script):
+        """Sync with a reasoner applying script and return the published changes"""
+        self.reasoner.script = script
+        self.interface.touch(self.device)
+        self.interface.sync()
+        return sorted((sign, str(prop), str(value))
+                      for sign, _, prop, value in self.deltas[-1].entities(self.world))
+
+    def test_added_and_removed(self):
+        rdf_type = self.world._unabbreviate(owlready2.rdf_type)
+        self.assertEqual(self.sync(lambda: self.device.is_a.append(self.ontology.Active)),
+                         [("+", rdf_type, "feed.Active")])
+        self.assertEqual(self.sync(lambda: self.device.is_a.remove(self.ontology.Active)),
+                         [("-", rdf_type, "feed.Active")])
+
+    def test_data_value_replaced(self):
+        def rename():
+            self.device.hasName = ["r2"]
+
+        self.assertEqual(self.sync(rename), [("+", "feed.hasName", "r2"), ("-", "feed.hasName", "r1")])
+
+    def test_rewritten_triple_is_unchanged(self):
+        def rewrite():
+            self.device.hasName = []
+            self.device.hasName = ["r1"]
+
+        self.assertEqual(self.sync(rewrite), [])
+
+    def test_log_dropped(self):
+        self.sync(lambda: None)
+        self.assertIsNone(self.world.graph.execute(
+            "SELECT name FROM sqlite_temp_master WHERE tbl_name=?",
+            (self.interface.feed.LOG,)).fetchone())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Tests of the indexes on class membership and data property values"""
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface
+from owlutils.engine import NativeReasoner
+
+
+class TestEntityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/index#")
+        with self.ontology:
+            class Port(owlready2.Thing):
+                pass
+
+            class Up(owlready2.Thing):
+                pass
+
+            class hasPort(owlready2.ObjectProperty):  # pylint: disable=invalid-name
+                range = [Port]
+
+            class Device(owlready2.Thing):
+                pass
+
+            class Active(owlready2.Thing):  # pylint: disable=unused-variable
+                equivalent_to = [Device & hasPort.some(Up)]
+
+            class hasName(owlready2.DataProperty):  # pylint: disable=invalid-name
+                range = [str]
+
+            self.port = Port("port")
+            self.device = Device("device", hasPort=[self.port], hasName=["r1"])
+
+        self.interface = OntologyInterface(self.ontology, NativeReasoner())
+        self.interface.enable_index("hasName")
+        self.interface.mapped(self.port, self.device)
+
+    def test_sync_updates_inferred_types(self):
+        self.assertEqual(self.interface.find("Active"), [])
+        self.port.is_a.append(self.ontology.Up)
+        self.interface.touch(self.port)
+        self.interface.sync()
+
+        self.assertEqual(self.interface.find("Active"), [self.device])
+        self.assertEqual(self.interface.index.rebuilds, 1)
+
+    def test_modify_query_updates_values(self):
+        self.interface.find("Device")
+        with self.ontology:
+            self.interface.query(
+                "PREFIX index: <http://example.org/index#> "
+                "DELETE { ?x index:hasName ?n } INSERT { ?x index:hasName 'r2' } "
+                "WHERE { ?x index:hasName ?n }")
+
+        self.assertEqual(self.interface.find("Device", hasName="r1"), [])
+        self.assertEqual(self.interface.find("Device", hasName="r2"), [self.device])
+        self.assertEqual(self.interface.index.rebuilds, 1)
+
+    def test_rollback_restores_entries(self):
+        self.interface.find("Device")
+        checkpoint = self.interface.checkpoint()
+        with self.ontology:
+            other = self.ontology.Device("other", hasName=["r1"])
+        self.interface.mapped(other)
+        self.assertEqual(len(self.interface.find("Device", hasName="r1")), 2)
+
+        self.interface.rollback(checkpoint)
+        self.assertEqual(self.interface.find("Device", hasName="r1"), [self.device])
+        self.assertEqual(self.interface.index.rebuilds, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
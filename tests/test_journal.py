@@ -0,0 +1,84 @@
+"""Tests of the change journal deciding whether a sync invokes the reasoner"""
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface
+from owlutils.reasoner import Reasoner
+
+
+class CountingReasoner(Reasoner):
+    """Reasoner counting its invocations"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def reason(self, ontology, debug=0, module=None):
+        self.calls += 1
+
+
+class DirectUpdate(OntologyInterface):
+    """Interface whose update creates individuals without recording them"""
+
+    def update(self, **kwargs) -> None:
+        self.pre_update()
+        with self.ontology:
+            self.ontology.Device(kwargs["name"])
+        self.post_update()
+
+
+class TestChangeJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/journal#")
+        with self.ontology:
+            class Device(owlready2.Thing):  # pylint: disable=unused-variable
+                pass
+        self.reasoner = CountingReasoner()
+        self.interface = DirectUpdate(self.ontology, self.reasoner)
+        self.interface.sync()
+
+    def test_unchanged_ontology_is_not_reasoned(self):
+        self.interface.sync()
+        self.assertEqual(self.reasoner.calls, 1)
+
+    def test_direct_mutation_is_reasoned(self):
+        self.interface.update(name="router")
+        self.interface.sync()
+        self.assertEqual(self.reasoner.calls, 2)
+        self.interface.sync()
+        self.assertEqual(self.reasoner.calls, 2)
+
+    def test_rollback_keeps_unsynced_mutation(self):
+        self.interface.update(name="router")
+        with self.interface.checkpoint():
+            self.interface.update(name="switch")
+        self.interface.sync()
+        self.assertEqual(self.reasoner.calls, 2)
+
+    def test_rollback_of_synced_state_is_not_reasoned(self):
+        with self.interface.checkpoint():
+            self.interface.update(name="switch")
+            self.interface.sync()
+        self.interface.sync()
+        self.assertEqual(self.reasoner.calls, 2)
+
+    def test_other_ontology_of_world_is_ignored(self):
+        other = self.world.get_ontology("http://example.org/other#")
+        with other:
+            class Device(owlready2.Thing):  # pylint: disable=unused-variable
+                pass
+        reasoner = CountingReasoner()
+        interface = DirectUpdate(other, reasoner)
+        for k in range(3):
+            interface.sync()
+            interface.update(name=f"router{k}")
+            self.interface.sync()
+
+        self.assertEqual(self.reasoner.calls, 1)
+        self.assertEqual(reasoner.calls, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
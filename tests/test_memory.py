@@ -0,0 +1,75 @@
+"""Tests of the memory accounting of map calls"""
+import tracemalloc
+import unittest
+
+import owlready2
+from owlutils.memory import MemoryBudgetExceeded
+from owlutils.utils import YANGOntology
+from yang2owl.owl.naming import class_name
+
+
+class Devices(YANGOntology):
+    """Ontology of devices named by their name field"""
+
+    def get_name(self, key, value):
+        return value["name"]
+
+
+class TestMemoryAccountant(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/memory#")
+        with self.ontology:
+            type(class_name("device"), (owlready2.Thing,), {})
+        self.interface = Devices(self.ontology)
+        self.reports = []
+        self.mapped = 0
+
+    def tearDown(self):
+        self.interface.disable_memory_accounting()
+
+    def map(self, count):
+        with self.ontology:
+            for _ in range(count):
+                self.mapped += 1
+                self.interface.map("device", {"name": f"d{self.mapped}"})
+
+    def test_callback_once_per_crossing(self):
+        accountant = self.interface.enable_memory_accounting(budget=1, callback=self.reports.append)
+        self.map(3)
+        self.assertEqual(len(self.reports), 1)
+
+        accountant.budget = 10 ** 12
+        self.map(1)
+        accountant.budget = 1
+        self.map(2)
+        self.assertEqual(len(self.reports), 2)
+        self.assertEqual(accountant.exceeded, 2)
+
+    def test_refused_on_every_call(self):
+        self.interface.enable_memory_accounting(budget=1, callback=self.reports.append, refuse=True)
+        for _ in range(2):
+            with self.assertRaises(MemoryBudgetExceeded):
+                self.map(1)
+        self.assertEqual(len(self.reports), 1)
+
+    def test_traced_during_sampled_calls_only(self):
+        accountant = self.interface.enable_memory_accounting(sample=2)
+        self.map(4)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(len(accountant.batches), 2)
+
+    def test_tracing_started_elsewhere_kept(self):
+        tracemalloc.start()
+        try:
+            self.interface.enable_memory_accounting()
+            self.map(1)
+            self.interface.disable_memory_accounting()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Tests of the syncs classifying only the module affected by the changes"""
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface, RuleManager
+from owlutils.engine import NativeReasoner
+
+
+class TestModuleExtractor(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/module#")
+        with self.ontology:
+            class Port(owlready2.Thing):
+                pass
+
+            class Device(owlready2.Thing):
+                pass
+
+            class Action(owlready2.Thing):
+                pass
+
+            class hasPort(owlready2.ObjectProperty):  # pylint: disable=invalid-name
+                range = [Port]
+
+            class Big(owlready2.Thing):  # pylint: disable=unused-variable
+                equivalent_to = [hasPort.min(2, Port)]
+
+            class isDown(owlready2.DataProperty, owlready2.FunctionalProperty):  # pylint: disable=invalid-name
+                range = [bool]
+
+            class actsOn(owlready2.ObjectProperty):  # pylint: disable=invalid-name,unused-variable
+                pass
+
+            self.restart = Action("restart")
+            self.devices = [Device(f"d{k}", isDown=True) for k in range(3)]
+
+        self.interface = OntologyInterface(self.ontology, NativeReasoner())
+        RuleManager(self.interface).add_rule("Device(?d), isDown(?d, true) -> actsOn(restart, ?d)")
+        self.interface.enable_module_extraction(depth=1)
+        self.interface.sync()
+
+    def test_changed_individual_classified_in_module(self):
+        device = self.devices[0]
+        with self.ontology:
+            device.hasPort = [self.ontology.Port("p1"), self.ontology.Port("p2")]
+        self.interface.touch(device)
+        self.interface.sync()
+
+        self.assertIn(self.ontology.Big, device.is_a)
+        self.assertEqual(self.interface.modules.modules, 1)
+
+    def test_facts_of_rule_individuals_kept(self):
+        self.assertEqual(set(self.restart.actsOn), set(self.devices))
+        with self.ontology:
+            device = self.ontology.Device("d3", isDown=True)
+        self.interface.touch(device)
+        self.interface.sync()
+
+        self.assertEqual(self.interface.modules.modules, 1)
+        self.assertIn(device, self.restart.actsOn)
+
+    def test_rule_change_classifies_everything(self):
+        full = self.interface.modules.full
+        RuleManager(self.interface).add_rule("Device(?d) -> Action(?d)")
+        self.interface.sync()
+
+        self.assertEqual(self.interface.modules.full, full + 1)
+        self.assertIn(self.ontology.Action, self.devices[0].is_a)
+
+
+if __name__ == "__main__":
+    unittest.main()
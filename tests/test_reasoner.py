@@ -0,0 +1,67 @@
+"""Tests of the reasoner backends"""
+import shutil
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface
+from owlutils.reasoner import Reasoner, PersistentPelletReasoner
+
+
+class FailingReasoner(Reasoner):
+    """Fallback reasoner recording that it has been invoked"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def reason(self, ontology, debug=0, module=None):
+        self.calls += 1
+
+
+@unittest.skipIf(shutil.which(owlready2.JAVA_EXE) is None, "java is not available")
+class TestPersistentPelletReasoner(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/pellet#")
+        with self.ontology:
+            class Port(owlready2.Thing):
+                pass
+
+            class Device(owlready2.Thing):
+                pass
+
+            class hasPort(owlready2.ObjectProperty):  # pylint: disable=invalid-name
+                range = [Port]
+
+            class Switch(Device):
+                equivalent_to = [Device & hasPort.some(Port)]
+
+        self.fallback = FailingReasoner()
+        self.reasoner = PersistentPelletReasoner(fallback=self.fallback)
+        self.interface = OntologyInterface(self.ontology, self.reasoner)
+
+    def tearDown(self):
+        self.reasoner.close()
+
+    def test_consecutive_requests_are_served_by_the_same_process(self):
+        ontology = self.ontology
+        with ontology:
+            first = ontology.Device("first", hasPort=[ontology.Port("p1")])
+        self.interface.touch(first)
+        self.interface.sync()
+        process = self.reasoner.process
+
+        with ontology:
+            second = ontology.Device("second", hasPort=[ontology.Port("p2")])
+        self.interface.touch(second)
+        self.interface.sync()
+
+        self.assertEqual(self.fallback.calls, 0)
+        self.assertIs(self.reasoner.process, process)
+        self.assertIn(ontology.Switch, first.is_a)
+        self.assertIn(ontology.Switch, second.is_a)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Tests of the partition of the individuals into shards"""
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface, RuleManager
+from owlutils.shard import ShardedReasoner
+
+
+class TestPartition(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/shard#")
+        with self.ontology:
+            class Device(owlready2.Thing):
+                pass
+
+            class Action(owlready2.Thing):
+                pass
+
+            class linked(owlready2.ObjectProperty):  # pylint: disable=invalid-name
+                pass
+
+            class actsOn(owlready2.ObjectProperty):  # pylint: disable=invalid-name,unused-variable
+                pass
+
+            self.restart = Action("restart")
+            self.devices = [Device(f"d{k}") for k in range(4)]
+            self.devices[0].linked = [self.devices[1]]
+            self.devices[2].linked = [self.devices[3]]
+            self.restart.actsOn = [self.devices[0], self.devices[2]]
+
+        self.reasoner = ShardedReasoner(shards=2)
+        interface = OntologyInterface(self.ontology, self.reasoner)
+        RuleManager(interface).add_rule("Device(?d), linked(?d, ?e) -> actsOn(restart, ?e)")
+        interface.pre_sync()
+
+    def test_rule_individuals_in_every_shard(self):
+        groups = self.reasoner.partition(self.world)
+        first, second = ({x.storid for x in (self.restart, *devices)}
+                         for devices in (self.devices[:2], self.devices[2:]))
+
+        self.assertEqual(len(groups), 2)
+        self.assertCountEqual(groups, [first, second])
+
+
+if __name__ == "__main__":
+    unittest.main()
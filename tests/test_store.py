@@ -0,0 +1,56 @@
+"""Tests of the checkpoints of the quadstore"""
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface
+from owlutils.engine import NativeReasoner
+from owlutils.store import Savepoint, TOUCHED
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/store#")
+        with self.ontology:
+            class Device(owlready2.Thing):
+                pass
+
+            class Switch(Device):  # pylint: disable=unused-variable
+                pass
+
+            self.devices = [Device(f"device{i}") for i in range(100)]
+        self.interface = OntologyInterface(self.ontology, NativeReasoner())
+
+    def test_rollback_restores_loaded_entities(self):
+        ontology = self.ontology
+        with self.interface.checkpoint():
+            with ontology:
+                self.devices[0].is_a.append(ontology.Switch)
+                ontology.Device("created")
+            self.devices[1].comment = ["changed"]
+
+        self.assertEqual(self.devices[0].is_a, [ontology.Device])
+        self.assertEqual(self.devices[1].comment, [])
+        self.assertIsNone(ontology.created)
+
+    def test_nested_rollback_keeps_outer_changes(self):
+        ontology = self.ontology
+        outer = self.interface.checkpoint()
+        with ontology:
+            ontology.Device("outer")
+        with self.interface.checkpoint():
+            with ontology:
+                ontology.Device("inner")
+        self.assertIsNotNone(ontology.outer)
+        self.assertIsNone(ontology.inner)
+
+        self.interface.release(outer)
+        self.assertIsNotNone(ontology.outer)
+        self.assertNotIn(self.world, Savepoint.depths)
+        self.assertIsNone(self.world.graph.execute(
+            "SELECT name FROM sqlite_temp_master WHERE name=?", (TOUCHED,)).fetchone())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+"""Tests of the timing of plugin hooks"""
+import unittest
+
+import owlready2
+from owlutils.base import OntologyInterface, OntologyPluginInterface
+from owlutils.engine import NativeReasoner
+
+
+class Counter(OntologyPluginInterface):
+    """Plugin doing nothing"""
+
+    def reserved_names(self):
+        return []
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.world = owlready2.World()
+        self.ontology = self.world.get_ontology("http://example.org/timing#")
+        self.interface = OntologyInterface(self.ontology, NativeReasoner())
+
+    def test_plugins_of_same_class_timed_apart(self):
+        Counter(self.interface)
+        Counter(self.interface)
+        self.interface.enable_instrumentation()
+        self.interface.update()
+
+        stats = self.interface.stats()
+        self.assertEqual(stats["Counter#0"]["pre_update"]["calls"], 1)
+        self.assertEqual(stats["Counter#1"]["pre_update"]["calls"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
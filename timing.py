@@ -0,0 +1,111 @@
+"""Wall and CPU time spent in the lifecycle hooks of plugins, in the reasoner and in syncs"""
+import time
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+TimingCallback = Callable[[str, str, float, float], None]
+
+
+class HookStats:
+    """Number of calls, wall time and CPU time of a hook"""
+
+    def __init__(self):
+        self.calls: int = 0
+        self.wall: float = 0
+        self.cpu: float = 0
+        self.last_wall: float = 0
+        self.last_cpu: float = 0
+
+    def record(self, wall: float, cpu: float) -> None:
+        """Add the timings of a call"""
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.last_wall = wall
+        self.last_cpu = cpu
+
+    def report(self) -> Dict[str, float]:
+        """Return the timings as a dictionary"""
+        return {
+            "calls": self.calls,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "last-wall": self.last_wall,
+            "last-cpu": self.last_cpu,
+        }
+
+
+class Instrumentation:
+    """
+    Record the time spent in every hook of every component, e.g. RuleManager#0 pre_sync or
+    PelletReasoner reason. The CPU time is the one of the calling thread: it does not include
+    the java process of Pellet, and for async hooks it includes the other tasks run by the
+    event loop in the meantime. If given, callback(component, hook, wall, cpu) is invoked
+    after every call, e.g. to forward the timings to an external sink
+    """
+
+    def __init__(self, callback: Optional[TimingCallback] = None):
+        self.callback = callback
+        self.hooks: Dict[Tuple[str, str], HookStats] = {}
+
+    @contextmanager
+    def measure(self, component: str, hook: str) -> Iterator[None]:
+        """Time the body of the with statement as a call of the hook of the component"""
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            self.hooks.setdefault((component, hook), HookStats()).record(wall, cpu)
+            if self.callback is not None:
+                self.callback(component, hook, wall, cpu)
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Return the timings of every hook grouped by component"""
+        report: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (component, hook), stats in self.hooks.items():
+            report.setdefault(component, {})[hook] = stats.report()
+        return report
+
+    def clear(self) -> None:
+        """Forget the recorded timings"""
+        self.hooks.clear()
+
+
+class SyncProfile:
+    """
+    Wall time of the phases of a sync: the plugin hooks, the preparation of the reasoner
+    input, the reasoner itself with the phases it reports (e.g. Pellet consistency check,
+    classification and realization) and the assertion of the inferred facts. The
+    diagnostic output of the reasoner, if any, is kept in output
+    """
+
+    def __init__(self):
+        self.started: float = time.time()
+        self.total: float = 0
+        self.phases: Dict[str, float] = {}
+        self.reasoner: Dict[str, float] = {}
+        self.output: str = ""
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the wall time of the body of the with statement to a phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    def report(self) -> Dict[str, Any]:
+        """Return the profile as a dictionary"""
+        return {
+            "started": self.started,
+            "total": self.total,
+            "phases": dict(self.phases),
+            "reasoner": dict(self.reasoner),
+            "output": self.output,
+        }
+
+    def __repr__(self) -> str:
+        return f"SyncProfile(total={self.total:.3f}, phases={len(self.phases)}, reasoner={len(self.reasoner)})"
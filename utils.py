@@ -5,6 +5,7 @@ from typing import Union, Dict, Any, Optional, Set, List, Tuple
 
 import owlready2 as owl
 from owlutils.base import OntologyInterface
+from owlutils.reasoner import Reasoner
 from yang2owl.owl.naming import class_name, role_name
 
 Value = Union[int, float, str, bool]
@@ -34,11 +35,18 @@ class YANGOntology(OntologyInterface):
 
     # Impl
 
-    def __init__(self, ontology: owl.Ontology):
-        super().__init__(ontology)
+    def __init__(self, ontology: owl.Ontology, reasoner: Optional[Reasoner] = None,
+                 isolated: bool = False):
+        super().__init__(ontology, reasoner, isolated)
         self.__role_cache: Dict[Tuple[owl.ThingClass, owl.ThingClass], str] =  {}
 
     def map(self, entity_type: str, entity: Dict[str, Any]) -> owl.Thing:
+        self.ensure_idle()
+        if self.metrics is not None:
+            self.metrics.map_calls += 1
+        if self.memory is not None:
+            with self.memory.batch(entity_type):
+                return self._entity_to_individual(entity_type, entity)
         return self._entity_to_individual(entity_type, entity)
 
     def update(self, **kwargs) -> None:
@@ -62,6 +70,7 @@ class YANGOntology(OntologyInterface):
         name = self.get_name(entity_type, descriptor)
         individual = individual_class(name)
         self._parse_descriptor(individual, descriptor)
+        self.mapped(individual)
         return individual
 
     def _parse_descriptor(self,
@@ -150,6 +159,8 @@ class YANGOntology(OntologyInterface):
             errors.append(descriptor)
 
         individual.is_a.append(data_property.exactly(list_length))
+        self.journal.record(data_property)
+        self.reindex(individual)
 
         return errors
 
@@ -186,6 +197,7 @@ class YANGOntology(OntologyInterface):
             errors.append(descriptor)
 
         individual.is_a.append(object_property.exactly(list_length))
+        self.journal.record(object_property)
 
         return errors
 